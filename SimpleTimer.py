@@ -1,13 +1,13 @@
 import sys
 import os
 import json
+import atexit
+import copy
 import threading
 import time
 import datetime
 import warnings
 import math
-import socket
-import struct
 import time as systime
 from datetime import datetime, timedelta
 
@@ -27,9 +27,24 @@ except ImportError:
     HAS_WIN_EXTRAS = False
     print("警告: PyQt5.QtWinExtras 不可用，Windows任务栏进度条功能将不可用")
 
+# 新增：qasync 可选，用于让 asyncio 与 Qt 共用同一个事件循环
+try:
+    import asyncio
+    import qasync
+    from timer_async import AsyncioScheduler
+    HAS_QASYNC = True
+except ImportError:
+    HAS_QASYNC = False
+
 from PyQt5.QtGui import QIcon, QColor
 from datetime import datetime
 
+# 设置的磁盘存储（不依赖Qt）
+from settings_store import FSYNC_POLICIES, HAS_SQLITE, JSONSettingsStore, SQLiteSettingsStore
+
+# 计时引擎与NTP校时逻辑（不依赖Qt）
+from timer_core import NTP_SERVERS, ScheduledTimer, NTPTimeSync, NTPClock, NTPPollScheduler, KernelClockSource
+
 class ProjectInfo:
     """项目信息元数据（集中管理所有项目相关信息）"""
     VERSION = "2.12.0"
@@ -55,21 +70,8 @@ class ProjectInfo:
 9. 纯时间显示窗口：点击时间标签弹出全屏时间显示窗口，带防烧屏保护
 """
     
-    # 新增：NTP服务器列表
-    NTP_SERVERS = [
-        # 新增：阿里云全套NTP服务器
-        'ntp1.aliyun.com',
-        'ntp2.aliyun.com',
-        'ntp3.aliyun.com',
-        'ntp4.aliyun.com',
-        'ntp5.aliyun.com',
-        'ntp6.aliyun.com',
-        'ntp7.aliyun.com',
-        'pool.ntp.org',            # NTP池项目
-        'cn.pool.ntp.org',         # 中国NTP池
-        'time.apple.com',         # 苹果时间服务器
-        'ntp.aliyun.com',         # 阿里云NTP服务器
-    ]
+    # 新增：NTP服务器列表（定义在 timer_core 中）
+    NTP_SERVERS = NTP_SERVERS
     
     # 在VERSION_HISTORY中添加新版本说明
     VERSION_HISTORY = {
@@ -247,164 +249,6 @@ class ProjectInfo:
         msg_box.setStandardButtons(QMessageBox.Ok)
         msg_box.exec_()
 
-class NTPTimeSync:
-    """NTP时间同步工具类"""
-    
-    NTP_PORT = 123
-    TIMEOUT = 5  # 连接超时时间（秒）
-    
-    @staticmethod
-    def ntp_request(server='time.windows.com', port=123):
-        """向NTP服务器请求时间"""
-        try:
-            # 创建UDP套接字
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.settimeout(NTPTimeSync.TIMEOUT)
-            
-            # 连接服务器
-            server_addr = (server, port)
-            
-            # 构建NTP请求数据包
-            data = b'\x1b' + 47 * b'\0'
-            
-            # 发送请求
-            sock.sendto(data, server_addr)
-            
-            # 接收响应
-            data, _ = sock.recvfrom(1024)
-            
-            # 关闭套接字
-            sock.close()
-            
-            if len(data) >= 48:
-                # 解析NTP响应
-                # 解析传输时间戳（第40-47字节）
-                transmit_timestamp = data[40:48]
-                
-                # 将字节转换为整数
-                int_part = struct.unpack('!I', transmit_timestamp[:4])[0]
-                frac_part = struct.unpack('!I', transmit_timestamp[4:])[0]
-                
-                # 转换为秒数（自1900年以来的秒数）
-                ntp_time = int_part + frac_part / 2**32 - 2208988800
-                
-                return ntp_time
-            else:
-                return None
-                
-        except socket.timeout:
-            print(f"连接NTP服务器 {server} 超时")
-            return None
-        except socket.gaierror:
-            print(f"无法解析NTP服务器地址: {server}")
-            return None
-        except Exception as e:
-            print(f"NTP请求失败 {server}: {e}")
-            return None
-    
-    @staticmethod
-    def get_ntp_time(server_list=None):
-        """从多个NTP服务器获取时间，选择最快响应的"""
-        if server_list is None:
-            server_list = ProjectInfo.NTP_SERVERS
-        
-        best_time = None
-        best_server = None
-        min_latency = float('inf')
-        
-        for server in server_list:
-            try:
-                start_time = systime.time()
-                ntp_time = NTPTimeSync.ntp_request(server)
-                end_time = systime.time()
-                
-                if ntp_time is not None:
-                    latency = end_time - start_time
-                    
-                    # 计算网络延迟补偿后的时间
-                    corrected_time = ntp_time + latency / 2
-                    
-                    # 如果这是最快的响应或第一个有效响应
-                    if latency < min_latency or best_time is None:
-                        min_latency = latency
-                        best_time = corrected_time
-                        best_server = server
-                        
-            except Exception as e:
-                print(f"从 {server} 获取时间失败: {e}")
-                continue
-        
-        if best_time is not None:
-            return {
-                'timestamp': best_time,
-                'server': best_server,
-                'latency': min_latency,
-                'local_time': systime.time(),
-                'offset': best_time - systime.time()
-            }
-        else:
-            return None
-    
-    @staticmethod
-    def get_formatted_ntp_time(server_list=None):
-        """获取格式化的NTP时间"""
-        result = NTPTimeSync.get_ntp_time(server_list)
-        
-        if result:
-            # 转换为datetime对象
-            ntp_datetime = datetime.fromtimestamp(result['timestamp'])
-            local_datetime = datetime.fromtimestamp(result['local_time'])
-            
-            return {
-                'ntp_time': ntp_datetime,
-                'local_time': local_datetime,
-                'server': result['server'],
-                'latency': result['latency'],
-                'offset': result['offset'],
-                'formatted_ntp': ntp_datetime.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
-                'formatted_local': local_datetime.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
-            }
-        else:
-            return None
-    
-    @staticmethod
-    def test_all_servers():
-        """测试所有NTP服务器的响应"""
-        results = []
-        
-        for server in ProjectInfo.NTP_SERVERS:
-            try:
-                start = systime.time()
-                ntp_time = NTPTimeSync.ntp_request(server)
-                end = systime.time()
-                
-                if ntp_time:
-                    latency = end - start
-                    offset = ntp_time - end
-                    results.append({
-                        'server': server,
-                        'latency': latency,
-                        'offset': offset,
-                        'status': '可用'
-                    })
-                else:
-                    results.append({
-                        'server': server,
-                        'latency': None,
-                        'offset': None,
-                        'status': '不可用'
-                    })
-                    
-            except Exception as e:
-                results.append({
-                    'server': server,
-                    'latency': None,
-                    'offset': None,
-                    'status': f'错误: {str(e)}'
-                })
-        
-        return results
-
 # 新增：纯时间显示窗口类
 class TimeDisplayWindow(QMainWindow):
     """纯时间显示窗口，带防烧屏保护和自适应缩放"""
@@ -501,8 +345,8 @@ class TimeDisplayWindow(QMainWindow):
         main_layout.addWidget(self.status_label)
 
         # 在状态标签中显示NTP状态
-        if self.parent_timer and hasattr(self.parent_timer, 'ntp_sync_enabled') and self.parent_timer.ntp_sync_enabled:
-            ntp_status = "NTP已同步" if self.parent_timer.ntp_last_sync_time else "NTP同步中"
+        if self.parent_timer and hasattr(self.parent_timer, 'ntp_clock') and self.parent_timer.ntp_clock.enabled:
+            ntp_status = "NTP已同步" if self.parent_timer.ntp_clock.last_sync_time else "NTP同步中"
             self.status_label.setText(f"点击右键显示菜单 | 防烧屏保护已启用 | {ntp_status}")
         else:
             self.status_label.setText("点击右键显示菜单 | 防烧屏保护已启用")
@@ -978,102 +822,109 @@ class MacaronColors_12:
 
 
 
-class TimerThread(QThread):
-    """计时器线程"""
+class TimerThread(QObject):
+    """计时器句柄
+
+    保留原 QThread 版本的接口（start/pause/resume/stop/isRunning/wait），
+    实际计时由共享的 TimerScheduler 完成，不再为每个计时器创建线程。
+    """
     update_signal = pyqtSignal(str, int)  # 更新时间信号
     alarm_signal = pyqtSignal()  # 闹钟信号
     
-    def __init__(self, duration_seconds, is_countdown=False, use_ntp=False):
+    def __init__(self, duration_seconds, is_countdown=False, use_ntp=False, tick_mode='second',
+                 scheduler=None):
         super().__init__()
         self.duration = duration_seconds
         self.is_countdown = is_countdown
         self.use_ntp = use_ntp
-        self.is_running = True
-        self.is_paused = False
-        self.pause_lock = threading.Lock()
-        self.elapsed = 0
-        self.start_time = None
+        # scheduler 为 None 时使用共享的后台调度线程；传入 AsyncioScheduler 时
+        # 回调直接在界面线程执行，信号不再跨线程排队
+        self.timer = ScheduledTimer(
+            duration_seconds, is_countdown,
+            clock=self.get_current_time,
+            on_update=self.update_signal.emit,
+            on_alarm=self.alarm_signal.emit,
+            scheduler=scheduler,
+            tick_mode=tick_mode,
+            freq=self.get_clock_freq if use_ntp else None,
+        )
+
+    @property
+    def is_paused(self):
+        return self.timer.is_paused
+
+    @property
+    def elapsed(self):
+        return self.timer.elapsed
         
     def get_current_time(self):
-        """获取当前时间（如果启用NTP则使用校正后的时间）"""
+        """获取当前墙上时间（如果启用NTP则使用校正后的时间），仅用于换算显示的截止时间"""
         if self.use_ntp and hasattr(self, 'parent_window'):
             return self.parent_window.get_corrected_time()
         else:
             return systime.time()
-    
-    def run(self):
-        if self.is_countdown:
-            remaining = self.duration
-            start_time = self.get_current_time()
-            
-            while remaining > 0 and self.is_running:
-                if not self.is_paused:
-                    # 使用更准确的时间计算
-                    current_time = self.get_current_time()
-                    elapsed_since_start = current_time - start_time
-                    remaining = max(0, self.duration - elapsed_since_start)
-                    
-                    mins, secs = divmod(int(remaining), 60)
-                    hours, mins = divmod(mins, 60)
-                    time_str = f"{hours:02d}:{mins:02d}:{secs:02d}"
-                    
-                    # 计算进度
-                    if self.duration > 0:
-                        progress = int((self.duration - remaining) * 100 / self.duration)
-                        progress = min(progress, 100)
-                    else:
-                        progress = 0
-                    
-                    self.update_signal.emit(time_str, progress)
-                    time.sleep(0.1)  # 更频繁的更新以提高准确性
-                else:
-                    # 暂停时更新开始时间
-                    start_time = self.get_current_time() - (self.duration - remaining)
-                    time.sleep(0.1)
-                    
-            if remaining <= 0:
-                self.update_signal.emit("00:00:00", 100)
-                self.alarm_signal.emit()
-        else:
-            self.elapsed = 0
-            start_time = self.get_current_time()
-            
-            while self.is_running:
-                if not self.is_paused:
-                    current_time = self.get_current_time()
-                    self.elapsed = current_time - start_time
-                    
-                    mins, secs = divmod(int(self.elapsed), 60)
-                    hours, mins = divmod(mins, 60)
-                    time_str = f"{hours:02d}:{mins:02d}:{secs:02d}"
-                    
-                    # 计时器模式：计算已用时间的百分比
-                    if self.duration > 0:
-                        progress = min(self.elapsed * 100 // max(self.duration, 1), 100)
-                    else:
-                        # 无限制计时器，每60秒一个周期
-                        progress = int(self.elapsed) % 60 * 100 // 60
-                    
-                    self.update_signal.emit(time_str, progress)
-                    time.sleep(0.1)  # 更频繁的更新以提高准确性
-                else:
-                    # 暂停时更新开始时间
-                    start_time = self.get_current_time() - self.elapsed
-                    time.sleep(0.1)
+
+    def get_clock_freq(self):
+        """新增：NTP估计的本地时钟频率误差，用于把本地时钟走过的时间换算成真实时间"""
+        if hasattr(self, 'parent_window'):
+            return self.parent_window.ntp_clock.freq
+        return 0.0
+
+    def start(self):
+        self.timer.start()
+
+    def isRunning(self):
+        return self.timer.is_running
+
+    def wait(self, msecs=None):
+        # 计时器没有独立线程，无需等待
+        return True
     
     def pause(self):
-        self.is_paused = True
+        self.timer.pause()
         
     def resume(self):
-        self.is_paused = False
+        self.timer.resume()
         
     def stop(self):
-        self.is_running = False
+        self.timer.stop()
 
 class SettingsManager:
-    """设置管理器"""
-    def __init__(self):
+    """设置管理器
+
+    新增：update_setting 只修改内存中的设置并标记为待保存，连续的修改在
+    SAVE_DELAY 秒内没有新修改后合并为一次写入（持续修改时最多推迟 MAX_SAVE_DELAY 秒）。
+    写文件在一个常驻的后台线程中进行，程序退出前调用 flush() 把未保存的修改写入磁盘。
+    update_setting 保存的是值的副本，调用方之后修改自己的列表/字典不会影响待写入的内容；
+    修改列表/字典类设置时应构造新对象后再调用 update_setting，不要直接修改 settings 中的值。
+
+    新增：磁盘存储由 settings_store 中的存储类负责，backend 可选：
+        'json'    timer_settings.json + 追加日志，原子替换（默认）
+        'sqlite'  timer_settings.db，每个键一行，只写入修改过的键
+    backend 为 None 时依次参考环境变量 SIMPLETIMER_SETTINGS_BACKEND 和是否已有
+    timer_settings.db。第一次使用 SQLite 时会自动迁移 timer_settings.json 中的设置。
+    fsync 为 settings_store.FSYNC_POLICIES 之一。
+    """
+
+    SAVE_DELAY = 0.5  # 最后一次修改后等待多久写入（秒）
+    MAX_SAVE_DELAY = 5.0  # 第一次未保存的修改最多等待多久写入（秒）
+    BACKENDS = ('json', 'sqlite')
+
+    def __init__(self, fsync='always', backend=None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"未知的 fsync 策略: {fsync}")
+        self.fsync = fsync
+        self._lock = threading.RLock()  # 保护 settings 和待保存状态
+        self._write_lock = threading.Lock()  # 保证同一时间只有一个线程写文件
+        self._dirty_since = None  # 第一次未保存修改的时间（monotonic），None 表示没有待保存的修改
+        self._dirty_keys = set()  # 待写入的键
+        self._needs_full_write = False  # 下次保存时写入全部设置
+        self._flush_at = None  # 后台线程计划写入的时间（monotonic），None 表示没有计划
+        self._flush_wakeup = threading.Condition(self._lock)
+        self._flush_thread = None
+        atexit.register(self.flush)
         self.settings_file = "timer_settings.json"
+        self.database_file = "timer_settings.db"
         self.default_settings = {
             "window_geometry": None,
             "window_state": None,
@@ -1111,34 +962,116 @@ class SettingsManager:
             "ntp_sync_interval": 3600,  # 默认1小时
             "ntp_last_sync_time": None,
             "ntp_time_offset": 0.0,
+            "ntp_clock_state": None,  # 时钟校正状态（偏移、漂移率、同步时刻），启动时恢复
+            "ntp_server_health": None,  # 各NTP服务器的可达性和轮询间隔
         }
+        self.backend = self._choose_backend(backend)
+        self.store = self._open_store()
         self.settings = self.load_settings()
+
+    def _choose_backend(self, backend):
+        if backend is None:
+            backend = os.environ.get('SIMPLETIMER_SETTINGS_BACKEND') or \
+                ('sqlite' if os.path.exists(self.database_file) else 'json')
+        if backend not in self.BACKENDS:
+            print(f"未知的设置存储方式 {backend}，使用 json")
+            backend = 'json'
+        if backend == 'sqlite' and not HAS_SQLITE:
+            print("sqlite3 不可用，设置改为保存在JSON文件中")
+            backend = 'json'
+        return backend
+
+    def _open_store(self):
+        json_store = JSONSettingsStore(self.settings_file, self.fsync)
+        if self.backend == 'json':
+            return json_store
+        store = SQLiteSettingsStore(self.database_file, self.fsync)
+        if store.is_empty() and json_store.exists():
+            # 迁移：把现有的JSON设置（含日志）整体写入数据库，原文件改名保留
+            legacy = json_store.load()
+            store.write_all({key: json.dumps(value, ensure_ascii=False) for key, value in legacy.items()})
+            json_store.retire()
+            print(f"已将设置从 {self.settings_file} 迁移到 {self.database_file}")
+        return store
     
     def load_settings(self):
-        try:
-            if os.path.exists(self.settings_file):
-                with open(self.settings_file, 'r', encoding='utf-8') as f:
-                    loaded = json.load(f)
-                    # 合并默认设置和加载的设置
-                    settings = self.default_settings.copy()
-                    settings.update(loaded)
-                    return settings
-        except Exception as e:
-            print(f"加载设置失败: {e}")
-        return self.default_settings.copy()
+        # 合并默认设置和加载的设置
+        settings = self.default_settings.copy()
+        settings.update(self.store.load())
+        return settings
     
     def save_settings(self):
-        try:
-            with open(self.settings_file, 'w', encoding='utf-8') as f:
-                json.dump(self.settings, f, ensure_ascii=False, indent=2)
-            return True
-        except Exception as e:
-            print(f"保存设置失败: {e}")
-            return False
+        """立即保存全部设置（替换磁盘上的全部内容）"""
+        with self._lock:
+            self._needs_full_write = True
+            if self._dirty_since is None:
+                self._dirty_since = time.monotonic()
+        return self.flush()
     
     def update_setting(self, key, value):
-        self.settings[key] = value
-        self.save_settings()
+        value = copy.deepcopy(value)
+        with self._lock:
+            self.settings[key] = value
+            self._dirty_keys.add(key)
+            now = time.monotonic()
+            if self._dirty_since is None:
+                self._dirty_since = now
+            # 持续修改时不再推迟，保证最迟 MAX_SAVE_DELAY 秒后写入
+            self._flush_at = min(now + self.SAVE_DELAY, self._dirty_since + self.MAX_SAVE_DELAY)
+            if self._flush_thread is None:
+                self._flush_thread = threading.Thread(target=self._flush_loop, name='SettingsFlush',
+                                                      daemon=True)
+                self._flush_thread.start()
+            self._flush_wakeup.notify()
+
+    def _flush_loop(self):
+        """后台写入线程：等到计划的写入时间后调用 flush()，期间的新修改只推迟计划时间"""
+        while True:
+            with self._lock:
+                while True:
+                    if self._flush_at is None:
+                        self._flush_wakeup.wait()
+                        continue
+                    delay = self._flush_at - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self._flush_wakeup.wait(delay)
+            self.flush()
+
+    def flush(self):
+        """把未保存的修改写入磁盘，没有待保存的修改时直接返回 True"""
+        with self._write_lock:
+            with self._lock:
+                self._flush_at = None
+                if self._dirty_since is None:
+                    return True
+                full = self._needs_full_write or self.store.wants_full_write()
+                keys = self._dirty_keys
+                try:
+                    # 在锁内编码：update_setting 在同一把锁下替换值（存入的是副本），编码期间值不会变化
+                    encoded = {key: json.dumps(self.settings[key], ensure_ascii=False)
+                               for key in (self.settings if full else keys) if key in self.settings}
+                except Exception as e:
+                    print(f"保存设置失败: {e}")
+                    return False
+                self._dirty_since = None
+                self._dirty_keys = set()
+                self._needs_full_write = False
+            try:
+                if full:
+                    self.store.write_all(encoded)
+                else:
+                    self.store.write_changes(encoded)
+                return True
+            except Exception as e:
+                print(f"保存设置失败: {e}")
+                with self._lock:
+                    # 写入失败，保留待保存状态，下次修改或退出时重试
+                    self._dirty_keys |= keys
+                    self._needs_full_write = self._needs_full_write or full
+                    if self._dirty_since is None:
+                        self._dirty_since = time.monotonic()
+                return False
 
 class CustomProgressBar(QProgressBar):
     """自定义进度条，显示更多信息"""
@@ -1160,26 +1093,127 @@ class CustomProgressBar(QProgressBar):
             }
         """)
 
+class NTPServerTestModel(QAbstractTableModel):
+    """NTP服务器测试结果表格模型，每收到一个结果只刷新对应的一行"""
+
+    HEADERS = ['服务器', '状态', '应答', '延迟p50(ms)', '延迟p95(ms)', '偏移p50(ms)', '偏移p5~p95(ms)']
+
+    def __init__(self, servers, parent=None):
+        super().__init__(parent)
+        self._rows = [{'server': server, 'status': '测试中', 'sent': 0, 'received': 0,
+                       'latency_p50': None, 'latency_p95': None,
+                       'offset_p05': None, 'offset_p50': None, 'offset_p95': None}
+                      for server in servers]
+        self._row_of = {server: i for i, server in enumerate(servers)}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            return self._display(row, column)
+        if role == Qt.ForegroundRole and column == 1:
+            if row['status'] == '可用':
+                return QColor('#4CAF50')
+            if row['status'] != '测试中':
+                return QColor('#F44336')
+        if role == Qt.TextAlignmentRole and column >= 2:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    @staticmethod
+    def _display(row, column):
+        def ms(value):
+            return '-' if value is None else f"{value * 1000:.1f}"
+
+        if column == 0:
+            return row['server']
+        if column == 1:
+            return row['status']
+        if column == 2:
+            return f"{row['received']}/{row['sent']}"
+        if column == 3:
+            return ms(row['latency_p50'])
+        if column == 4:
+            return ms(row['latency_p95'])
+        if column == 5:
+            return ms(row['offset_p50'])
+        if row['offset_p05'] is None:
+            return '-'
+        return f"{ms(row['offset_p05'])} ~ {ms(row['offset_p95'])}"
+
+    def update_row(self, summary):
+        """用 NTPProbeStats.summary 的结果替换对应服务器的一行"""
+        i = self._row_of.get(summary['server'])
+        if i is None:
+            return
+        self._rows[i] = summary
+        self.dataChanged.emit(self.index(i, 0), self.index(i, len(self.HEADERS) - 1))
+
+    def available_count(self):
+        return sum(1 for row in self._rows if row['received'])
+
+    def best_server(self):
+        """延迟中位数最低的服务器"""
+        available = [row for row in self._rows if row['latency_p50'] is not None]
+        if not available:
+            return None
+        return min(available, key=lambda row: row['latency_p50'])['server']
+
 class TimerWindow(QMainWindow):
+    # 新增：NTP自动同步间隔选项（显示文字 -> 秒）
+    NTP_INTERVAL_OPTIONS = {
+        '15分钟': 900,
+        '30分钟': 1800,
+        '1小时': 3600,
+        '2小时': 7200,
+        '6小时': 21600,
+        '12小时': 43200,
+        '24小时': 86400
+    }
+
     # 在类定义中添加信号
     ntp_sync_success = pyqtSignal(dict)
     ntp_sync_failed = pyqtSignal(str)
     server_test_complete = pyqtSignal(list)
+    server_test_result = pyqtSignal(dict)  # 新增：服务器测试中单个服务器的最新统计
 
-    def __init__(self):
+    def __init__(self, loop=None):
         super().__init__()
         self.settings_manager = SettingsManager()
         self.timer_thread = None
+        # 新增：在 qasync 事件循环上运行时，计时器直接由界面线程的 asyncio 循环驱动
+        self.timer_scheduler = AsyncioScheduler(loop) if loop is not None else None
         self.alarm_sound = None
         self.current_timer_type = None
         self.current_duration = 0
         
         # 新增：NTP校时相关属性
-        self.ntp_time_offset = 0.0  # NTP时间与本地时间的偏移量（秒）
-        self.ntp_sync_enabled = False  # 是否启用NTP同步
-        self.ntp_last_sync_time = None  # 上次同步时间
+        self.ntp_clock = NTPClock()  # NTP校正时钟（偏移量、是否启用、上次同步时间）
         self.ntp_sync_interval = 3600  # 同步间隔（秒，默认1小时）
         self.ntp_sync_timer = None  # 自动同步定时器
+        # 新增：NTP服务器测试窗口（测试进行中或窗口打开时不为 None）
+        self.server_test_dialog = None
+        self.server_test_model = None
+        self.server_test_label = None
+        self.server_test_stop = None
+        # 新增：按服务器健康状态自适应安排轮询，ntp_sync_interval 作为基准间隔
+        self.ntp_poller = NTPPollScheduler(interval=self.ntp_sync_interval)
+        # 新增：系统时间服务已校准时钟时直接采用系统时间，不再查询网络
+        self.kernel_clock = KernelClockSource()
+        self.ntp_using_kernel = False  # 上次同步结果是否来自系统时间服务
         
 
         # 新增：纯时间显示窗口
@@ -1212,6 +1246,9 @@ class TimerWindow(QMainWindow):
         self.flash_count = 0
         self.taskbar_timer = None
         self.original_style = ""
+
+        # 新增：NTP同步定时器必须在加载设置之前创建，恢复"已启用"状态时才能启动自动同步
+        self.init_ntp_sync()
         
         self.init_ui()
         self.load_settings()
@@ -1224,13 +1261,12 @@ class TimerWindow(QMainWindow):
         self.ntp_sync_success.connect(self.on_ntp_sync_success)
         self.ntp_sync_failed.connect(self.on_ntp_sync_failed)
         self.server_test_complete.connect(self.on_server_test_complete)
-
-        # 新增：初始化NTP同步定时器
-        self.init_ntp_sync()
+        self.server_test_result.connect(self.on_server_test_result)
         
     def init_ntp_sync(self):
         """初始化NTP同步"""
         self.ntp_sync_timer = QTimer(self)
+        self.ntp_sync_timer.setSingleShot(True)  # 每次同步后按轮询计划重新安排
         self.ntp_sync_timer.timeout.connect(self.auto_ntp_sync)
         
     def init_ui(self):
@@ -1701,7 +1737,7 @@ class TimerWindow(QMainWindow):
         interval_combo_layout.addWidget(QLabel('同步间隔:'))
         
         self.ntp_interval_combo = QComboBox()
-        self.ntp_interval_combo.addItems(['15分钟', '30分钟', '1小时', '2小时', '6小时', '12小时', '24小时'])
+        self.ntp_interval_combo.addItems(list(self.NTP_INTERVAL_OPTIONS))
         self.ntp_interval_combo.setCurrentText('1小时')
         self.ntp_interval_combo.currentTextChanged.connect(self.change_ntp_interval)
         interval_combo_layout.addWidget(self.ntp_interval_combo)
@@ -1725,8 +1761,8 @@ class TimerWindow(QMainWindow):
         self.ntp_offset_label.setStyleSheet("color: #666; font-size: 14px;")
         status_layout.addWidget(self.ntp_offset_label)
         
-        if self.ntp_last_sync_time:
-            sync_time_label = QLabel(f'上次同步: {self.ntp_last_sync_time.strftime("%Y-%m-%d %H:%M:%S")}')
+        if self.ntp_clock.last_sync_time:
+            sync_time_label = QLabel(f'上次同步: {self.ntp_clock.last_sync_time.strftime("%Y-%m-%d %H:%M:%S")}')
             sync_time_label.setStyleSheet("color: #666; font-size: 12px;")
             status_layout.addWidget(sync_time_label)
         
@@ -2017,6 +2053,7 @@ class TimerWindow(QMainWindow):
             else:
                 # 否则正常关闭程序
                 self.save_current_settings()
+                self.settings_manager.flush()
                 event.accept()
                 
         except Exception as e:
@@ -2139,8 +2176,46 @@ class TimerWindow(QMainWindow):
         if 'show_alert_dialog' in settings:
             self.alert_dialog_checkbox.setChecked(settings['show_alert_dialog'])
 
+        # 新增：恢复NTP设置和上次的时钟校正状态，NTP模式的计时器启动后立即可用
+        self.load_ntp_settings(settings)
+
         # 加载最近计时器
         self.update_recent_list()
+
+    def load_ntp_settings(self, settings):
+        """恢复NTP同步设置、服务器健康状态和时钟校正状态"""
+        self.ntp_sync_interval = settings.get('ntp_sync_interval', 3600)
+        self.ntp_poller.set_interval(self.ntp_sync_interval)
+        for text, seconds in self.NTP_INTERVAL_OPTIONS.items():
+            if seconds == self.ntp_sync_interval:
+                self.ntp_interval_combo.setCurrentText(text)
+                break
+
+        health = settings.get('ntp_server_health')
+        if health:
+            self.ntp_poller.restore_state(health.get('servers'),
+                                          max(0.0, time.time() - health.get('saved', time.time())))
+
+        if self.ntp_clock.restore_state(settings.get('ntp_clock_state')):
+            sync_time_str = self.ntp_clock.last_sync_time.strftime('%m-%d %H:%M:%S')
+            self.ntp_status_label.setText(
+                f'状态: 已恢复上次同步 ({sync_time_str}，可信度 {self.ntp_clock.confidence:.0%})')
+            self.ntp_status_label.setStyleSheet("color: #FF9800; font-style: italic;")
+            self.ntp_offset_label.setText(f'时间偏移: {self.ntp_clock.offset:+.3f} 秒')
+
+        # 勾选后会触发 toggle_ntp_sync，开始自动同步
+        self.ntp_enable_checkbox.setChecked(settings.get('ntp_sync_enabled', False))
+
+    def save_ntp_state(self):
+        """保存NTP同步设置和时钟校正状态"""
+        last_sync = self.ntp_clock.last_sync_time
+        self.settings_manager.update_setting('ntp_sync_enabled', self.ntp_clock.enabled)
+        self.settings_manager.update_setting('ntp_sync_interval', self.ntp_sync_interval)
+        self.settings_manager.update_setting('ntp_time_offset', self.ntp_clock.offset)
+        self.settings_manager.update_setting('ntp_last_sync_time', last_sync.isoformat() if last_sync else None)
+        self.settings_manager.update_setting('ntp_clock_state', self.ntp_clock.state())
+        self.settings_manager.update_setting('ntp_server_health',
+                                             {'saved': time.time(), 'servers': self.ntp_poller.state()})
     
     def save_current_settings(self):
         """保存当前设置"""
@@ -2156,6 +2231,8 @@ class TimerWindow(QMainWindow):
         self.settings_manager.update_setting('window_flash', self.window_flash_checkbox.isChecked())
         self.settings_manager.update_setting('taskbar_flash', self.taskbar_flash_checkbox.isChecked())
         self.settings_manager.update_setting('show_alert_dialog', self.alert_dialog_checkbox.isChecked())
+        # 新增：保存NTP设置和时钟校正状态
+        self.save_ntp_state()
     
     def start_timer(self):
         """开始计时"""
@@ -2172,8 +2249,8 @@ class TimerWindow(QMainWindow):
         self.update_timer_display_style()
 
         # 使用NTP时间（如果启用）
-        use_ntp = self.ntp_sync_enabled
-        self.timer_thread = TimerThread(0, False, use_ntp)
+        use_ntp = self.ntp_clock.enabled
+        self.timer_thread = TimerThread(0, False, use_ntp, scheduler=self.timer_scheduler)
         self.timer_thread.parent_window = self  # 传递父窗口引用以获取校正时间
     
         self.timer_thread.update_signal.connect(self.update_timer_display)
@@ -2303,8 +2380,8 @@ class TimerWindow(QMainWindow):
             self.tray_icon.setToolTip(f'倒计时: {self.seconds_to_time_str(total_seconds)}')
         
         # 使用NTP时间（如果启用）
-        use_ntp = self.ntp_sync_enabled
-        self.timer_thread = TimerThread(total_seconds, True, use_ntp)
+        use_ntp = self.ntp_clock.enabled
+        self.timer_thread = TimerThread(total_seconds, True, use_ntp, scheduler=self.timer_scheduler)
         self.timer_thread.parent_window = self  # 传递父窗口引用以获取校正时间
     
         self.timer_thread.update_signal.connect(self.update_countdown_display)
@@ -2329,7 +2406,8 @@ class TimerWindow(QMainWindow):
         self.start_countdown_btn.setEnabled(False)
         self.pause_countdown_btn.setEnabled(True)
         self.reset_countdown_btn.setEnabled(True)
-        self.status_bar.showMessage(f'倒计时开始: {self.seconds_to_time_str(total_seconds)}')
+        self.status_bar.showMessage(f'倒计时开始: {self.seconds_to_time_str(total_seconds)}'
+                                    f'{self.countdown_end_text()}')
         
         # 新增：显示任务栏进度条（确定模式，从0开始）
         print(f"开始倒计时，显示任务栏进度条，总时长: {total_seconds}秒")
@@ -2361,7 +2439,7 @@ class TimerWindow(QMainWindow):
             else:
                 self.timer_thread.resume()
                 self.pause_countdown_btn.setText('暂停')
-                self.status_bar.showMessage('倒计时运行中...')
+                self.status_bar.showMessage(f'倒计时运行中...{self.countdown_end_text()}')
             
                 # 更新倒计时状态为运行中
                 self.countdown_state = 'running'
@@ -3026,7 +3104,7 @@ class TimerWindow(QMainWindow):
             QMessageBox.warning(self, '警告', '请输入预设名称')
             return
         
-        preset_timers = self.settings_manager.settings['preset_timers']
+        preset_timers = dict(self.settings_manager.settings['preset_timers'])
         preset_timers[name] = seconds
         self.settings_manager.update_setting('preset_timers', preset_timers)
         
@@ -3065,7 +3143,7 @@ class TimerWindow(QMainWindow):
     
     def add_to_recent_timers(self, seconds):
         """添加到最近计时器"""
-        recent_timers = self.settings_manager.settings.get('recent_timers', [])
+        recent_timers = list(self.settings_manager.settings.get('recent_timers', []))
         
         # 移除重复项
         if seconds in recent_timers:
@@ -3113,6 +3191,16 @@ class TimerWindow(QMainWindow):
             
             QMessageBox.information(self, '完成', '设置已重置为默认值')
     
+    def countdown_end_text(self):
+        """新增：倒计时预计结束的时刻（启用NTP时按校正后的时间换算），用于状态栏"""
+        deadline = self.timer_thread.timer.wall_deadline() if self.timer_thread else None
+        if deadline is None:
+            return ''
+        end_str = datetime.fromtimestamp(deadline).strftime('%H:%M:%S')
+        if self.timer_thread.use_ntp and self.ntp_clock.last_sync_time:
+            return f'，预计 {end_str} 结束（NTP校正时间）'
+        return f'，预计 {end_str} 结束'
+
     def seconds_to_time_str(self, seconds):
         """秒数转换为时间字符串"""
         hours, remainder = divmod(seconds, 3600)
@@ -3126,6 +3214,7 @@ class TimerWindow(QMainWindow):
     def close_application(self):
         """关闭应用程序"""
         self.save_current_settings()
+        self.settings_manager.flush()
         QApplication.quit()
 
     def toggle_minimize_to_tray(self, state):
@@ -3332,6 +3421,10 @@ class TimerWindow(QMainWindow):
             # 关闭时间显示窗口
             if self.time_display_window:
                 self.time_display_window.close()
+
+            # 新增：停止正在进行的NTP服务器测试
+            if self.server_test_stop:
+                self.server_test_stop.set()
                 
         except Exception as e:
             print(f"清理资源时出错: {e}")
@@ -3611,7 +3704,7 @@ class TimerWindow(QMainWindow):
 
     def toggle_ntp_sync(self, state):
         """切换NTP同步设置"""
-        self.ntp_sync_enabled = bool(state)
+        self.ntp_clock.enabled = bool(state)
         
         if state:
             # 启用自动同步
@@ -3624,19 +3717,10 @@ class TimerWindow(QMainWindow):
 
     def change_ntp_interval(self, interval_text):
         """改变NTP同步间隔"""
-        interval_map = {
-            '15分钟': 900,
-            '30分钟': 1800,
-            '1小时': 3600,
-            '2小时': 7200,
-            '6小时': 21600,
-            '12小时': 43200,
-            '24小时': 86400
-        }
-        
-        self.ntp_sync_interval = interval_map.get(interval_text, 3600)
+        self.ntp_sync_interval = self.NTP_INTERVAL_OPTIONS.get(interval_text, 3600)
+        self.ntp_poller.set_interval(self.ntp_sync_interval)
         
-        if self.ntp_sync_enabled:
+        if self.ntp_clock.enabled:
             self.stop_auto_ntp_sync()
             self.start_auto_ntp_sync()
         
@@ -3644,12 +3728,25 @@ class TimerWindow(QMainWindow):
 
     def start_auto_ntp_sync(self):
         """开始自动NTP同步"""
+        # 先在后台解析服务器地址，稍后的同步可以直接命中缓存
+        NTPTimeSync.resolver.prefetch(NTP_SERVERS)
+
+        # 立即执行一次同步，之后由轮询计划决定下次同步时间
         if self.ntp_sync_timer:
             self.ntp_sync_timer.stop()
-            self.ntp_sync_timer.start(self.ntp_sync_interval * 1000)
-        
-        # 立即执行一次同步
-        QTimer.singleShot(1000, self.manual_ntp_sync)
+            self.ntp_sync_timer.start(1000)
+
+    def schedule_next_ntp_sync(self):
+        """按最早到期的服务器安排下一次自动同步"""
+        if self.ntp_clock.enabled and self.ntp_sync_timer:
+            if self.ntp_using_kernel:
+                # 系统时间服务负责校时，只需定期确认它仍处于同步状态
+                delay = self.ntp_sync_interval * 2 ** NTPPollScheduler.MIN_POLL_EXP
+            else:
+                delay = self.ntp_poller.seconds_until_next()
+            # QTimer 的间隔是32位毫秒数，最长等待一天后再检查
+            delay = min(max(1.0, delay), 86400)
+            self.ntp_sync_timer.start(int(delay * 1000))
 
     def stop_auto_ntp_sync(self):
         """停止自动NTP同步"""
@@ -3657,7 +3754,11 @@ class TimerWindow(QMainWindow):
             self.ntp_sync_timer.stop()
 
     def manual_ntp_sync(self):
-        """手动执行NTP同步"""
+        """手动执行NTP同步（查询全部服务器）"""
+        self._start_ntp_sync(force=True)
+
+    def _start_ntp_sync(self, force):
+        """在后台线程中执行一次同步，force 为 False 时只查询到期的服务器"""
         try:
             self.status_bar.showMessage('正在同步NTP时间...')
             
@@ -3666,7 +3767,7 @@ class TimerWindow(QMainWindow):
             self.ntp_status_label.setStyleSheet("color: #FF9800; font-style: italic;")
             
             # 使用线程执行NTP同步，避免界面冻结
-            sync_thread = threading.Thread(target=self._perform_ntp_sync)
+            sync_thread = threading.Thread(target=self._perform_ntp_sync, args=(force,))
             sync_thread.daemon = True
             sync_thread.start()
             
@@ -3675,11 +3776,13 @@ class TimerWindow(QMainWindow):
             self.ntp_status_label.setStyleSheet("color: red; font-style: italic;")
             self.status_bar.showMessage(f'NTP同步失败: {e}')
 
-    def _perform_ntp_sync(self):
+    def _perform_ntp_sync(self, force=True):
         """执行NTP同步（在线程中运行）"""
         try:
-            # 获取NTP时间
-            ntp_result = NTPTimeSync.get_formatted_ntp_time()
+            # 系统时钟已被系统时间服务校准时直接采用，否则查询NTP服务器
+            result = self.kernel_clock.sync_result() or \
+                self.ntp_poller.poll(force=force, freq=self.ntp_clock.freq)
+            ntp_result = NTPTimeSync.format_result(result)
             
             # 使用信号在GUI线程中更新界面
             if ntp_result:
@@ -3692,15 +3795,17 @@ class TimerWindow(QMainWindow):
 
     def on_ntp_sync_success(self, result):
         """NTP同步成功处理"""
-        self.ntp_time_offset = result['offset']
-        self.ntp_last_sync_time = datetime.now()
+        self.ntp_using_kernel = result['server'] == KernelClockSource.NAME
+        self.ntp_clock.apply_sync(result)
+        self.schedule_next_ntp_sync()
+        self.save_ntp_state()
         
         # 格式化显示信息
-        offset_str = f"{self.ntp_time_offset:.3f}"
-        if self.ntp_time_offset > 0:
+        offset_str = f"{self.ntp_clock.offset:.3f}"
+        if self.ntp_clock.offset > 0:
             offset_display = f"+{offset_str}"
             color = "green"
-        elif self.ntp_time_offset < 0:
+        elif self.ntp_clock.offset < 0:
             offset_display = offset_str
             color = "red"
         else:
@@ -3708,7 +3813,7 @@ class TimerWindow(QMainWindow):
             color = "green"
         
         # 更新状态标签
-        sync_time_str = self.ntp_last_sync_time.strftime('%H:%M:%S')
+        sync_time_str = self.ntp_clock.last_sync_time.strftime('%H:%M:%S')
         self.ntp_status_label.setText(f'状态: 已同步 ({sync_time_str})')
         self.ntp_status_label.setStyleSheet("color: green; font-style: italic;")
         
@@ -3724,15 +3829,22 @@ class TimerWindow(QMainWindow):
     本地时间: {result['formatted_local']}
     NTP时间: {result['formatted_ntp']}"""
         
-        self.status_bar.showMessage(f'NTP同步成功，时间偏移: {offset_display} 秒')
+        if self.ntp_using_kernel:
+            self.status_bar.showMessage(f'系统时间已由系统时间服务校准，'
+                                        f'估计误差: {result["jitter"] * 1000:.1f} ms')
+        else:
+            self.status_bar.showMessage(f'NTP同步成功，时间偏移: {offset_display} 秒，'
+                                        f'本地时钟漂移: {self.ntp_clock.drift_ppm:+.1f} ppm')
         
         # 如果偏移量过大，显示警告
-        if abs(self.ntp_time_offset) > 1.0:
+        if abs(self.ntp_clock.offset) > 1.0:
             QMessageBox.warning(self, '时间偏移警告', 
                 f"本地时间与NTP服务器时间偏移较大: {offset_display} 秒\n建议调整系统时间以保证计时准确性。")
 
     def on_ntp_sync_failed(self, error_msg):
         """NTP同步失败处理"""
+        self.ntp_using_kernel = False
+        self.schedule_next_ntp_sync()
         self.ntp_status_label.setText('状态: 同步失败')
         self.ntp_status_label.setStyleSheet("color: red; font-style: italic;")
         self.ntp_offset_label.setText('时间偏移: 未知')
@@ -3742,101 +3854,100 @@ class TimerWindow(QMainWindow):
         QMessageBox.warning(self, 'NTP同步失败', f"无法同步NTP时间:\n{error_msg}")
 
     def test_ntp_servers(self):
-        """测试所有NTP服务器"""
+        """测试所有NTP服务器：立即打开结果窗口，多轮测试的结果边测边显示"""
+        if self.server_test_dialog is not None:
+            self.server_test_dialog.raise_()
+            self.server_test_dialog.activateWindow()
+            return
         try:
             self.status_bar.showMessage('正在测试NTP服务器...')
-            
+
+            # 创建结果显示对话框（非模态，测试期间界面仍可操作）
+            dialog = QDialog(self)
+            dialog.setWindowTitle('NTP服务器测试结果')
+            dialog.setMinimumSize(720, 400)
+            dialog.setAttribute(Qt.WA_DeleteOnClose)
+            layout = QVBoxLayout(dialog)
+
+            self.server_test_model = NTPServerTestModel(NTP_SERVERS, dialog)
+            table = QTableView()
+            table.setModel(self.server_test_model)
+            table.verticalHeader().setVisible(False)
+            table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+            layout.addWidget(table)
+
+            self.server_test_label = QLabel(f'正在测试（共 {NTPTimeSync.PROBE_ROUNDS} 轮）...')
+            layout.addWidget(self.server_test_label)
+
+            # 按钮
+            button_box = QDialogButtonBox(QDialogButtonBox.Close)
+            stop_button = button_box.addButton('停止测试', QDialogButtonBox.ActionRole)
+            button_box.rejected.connect(dialog.close)
+            layout.addWidget(button_box)
+
+            self.server_test_stop = threading.Event()
+            stop_button.clicked.connect(self.server_test_stop.set)
+            dialog.finished.connect(self.server_test_stop.set)
+            dialog.destroyed.connect(self._on_server_test_dialog_closed)
+            self.server_test_dialog = dialog
+            dialog.show()
+
             # 在线程中执行测试
-            test_thread = threading.Thread(target=self._perform_server_test)
+            test_thread = threading.Thread(target=self._perform_server_test, args=(self.server_test_stop,))
             test_thread.daemon = True
             test_thread.start()
             
         except Exception as e:
             self.status_bar.showMessage(f'测试NTP服务器失败: {e}')
 
-    def _perform_server_test(self):
-        """执行服务器测试（在线程中运行）"""
+    def _on_server_test_dialog_closed(self):
+        self.server_test_dialog = None
+        self.server_test_model = None
+        self.server_test_label = None
+
+    def _perform_server_test(self, stop_event):
+        """执行服务器测试（在线程中运行），每个结果通过信号送到界面线程"""
         try:
-            results = NTPTimeSync.test_all_servers()
-            self.server_test_complete.emit(results)
+            stats = NTPTimeSync.probe_servers(on_result=self.server_test_result.emit,
+                                              stop_event=stop_event)
+            self.server_test_complete.emit(stats.summaries())
         except Exception as e:
             self.server_test_complete.emit([{'error': str(e)}])
 
+    def on_server_test_result(self, summary):
+        """收到一个服务器的最新统计，更新表格"""
+        if self.server_test_model is None:
+            return
+        self.server_test_model.update_row(summary)
+        self.server_test_label.setText(self._server_test_summary_text('正在测试'))
+
+    def _server_test_summary_text(self, prefix):
+        model = self.server_test_model
+        text = f"{prefix} | 可用服务器: {model.available_count()}/{model.rowCount()}"
+        best_server = model.best_server()
+        if best_server:
+            text += f" | 最佳服务器: {best_server}"
+        return text
+
     def on_server_test_complete(self, results):
         """服务器测试完成处理"""
         if results and 'error' in results[0]:
             QMessageBox.critical(self, '测试错误', f"测试NTP服务器时发生错误:\n{results[0]['error']}")
             return
-        
-        # 创建结果显示对话框
-        dialog = QDialog(self)
-        dialog.setWindowTitle('NTP服务器测试结果')
-        dialog.setMinimumSize(500, 400)
-        
-        layout = QVBoxLayout(dialog)
-        
-        # 创建表格显示结果
-        table = QTableWidget()
-        table.setColumnCount(4)
-        table.setHorizontalHeaderLabels(['服务器', '状态', '延迟(ms)', '偏移(ms)'])
-        table.setRowCount(len(results))
-        
-        available_count = 0
-        best_server = None
-        min_latency = float('inf')
-        
-        for i, result in enumerate(results):
-            table.setItem(i, 0, QTableWidgetItem(result['server']))
-            table.setItem(i, 1, QTableWidgetItem(result['status']))
-            
-            if result['status'] == '可用':
-                available_count += 1
-                latency_ms = result['latency'] * 1000 if result['latency'] else 0
-                offset_ms = result['offset'] * 1000 if result['offset'] else 0
-                
-                table.setItem(i, 2, QTableWidgetItem(f"{latency_ms:.1f}"))
-                table.setItem(i, 3, QTableWidgetItem(f"{offset_ms:.1f}"))
-                
-                # 查找最佳服务器
-                if result['latency'] and result['latency'] < min_latency:
-                    min_latency = result['latency']
-                    best_server = result['server']
-            else:
-                table.setItem(i, 2, QTableWidgetItem('-'))
-                table.setItem(i, 3, QTableWidgetItem('-'))
-        
-        table.resizeColumnsToContents()
-        layout.addWidget(table)
-        
-        # 统计信息
-        stats_label = QLabel(f"可用服务器: {available_count}/{len(results)}")
-        if best_server:
-            stats_label.setText(stats_label.text() + f" | 最佳服务器: {best_server}")
-        
-        layout.addWidget(stats_label)
-        
-        # 按钮
-        button_box = QDialogButtonBox(QDialogButtonBox.Ok)
-        button_box.accepted.connect(dialog.accept)
-        layout.addWidget(button_box)
-        
-        dialog.exec_()
-        
+
+        available_count = sum(1 for result in results if result['received'])
+        if self.server_test_model is not None:
+            self.server_test_label.setText(self._server_test_summary_text('测试完成'))
         self.status_bar.showMessage(f'NTP服务器测试完成，{available_count}个服务器可用')
 
     def auto_ntp_sync(self):
         """自动NTP同步"""
-        if self.ntp_sync_enabled:
-            self.manual_ntp_sync()
+        if self.ntp_clock.enabled:
+            self._start_ntp_sync(force=False)
 
     def get_corrected_time(self):
         """获取经过NTP校正的时间"""
-        if self.ntp_sync_enabled and self.ntp_last_sync_time:
-            # 考虑时间漂移，可以加上自上次同步以来的时间
-            time_since_sync = (datetime.now() - self.ntp_last_sync_time).total_seconds()
-            return systime.time() + self.ntp_time_offset + time_since_sync
-        else:
-            return systime.time()
+        return self.ntp_clock.now()
 
 def main():
     app = QApplication(sys.argv)
@@ -3846,6 +3957,17 @@ def main():
     font = QFont('Microsoft YaHei', 10)
     app.setFont(font)
     
+    # 新增：安装了 qasync 时由 asyncio 循环承载 Qt 事件循环
+    if HAS_QASYNC:
+        loop = qasync.QEventLoop(app)
+        asyncio.set_event_loop(loop)
+        window = TimerWindow(loop=loop)
+        window.show()
+        with loop:
+            # qasync 的 run_forever 内部调用 app.exec_()，返回程序的退出码
+            exit_code = loop.run_forever()
+        sys.exit(exit_code)
+    
     window = TimerWindow()
     window.show()
     
@@ -0,0 +1,118 @@
+"""NTP客户端基准：用本地SNTP应答器测量同步精度和耗时，不需要网络
+
+每个场景启动一组回环应答器（时间都比本机快 --offset 秒，个别服务器按场景
+设置成错误时钟、丢包或拒绝服务），然后反复调用 NTPTimeSync.get_ntp_time 和
+test_all_servers，记录：
+- 同步耗时的百分位数
+- 同步结果的偏移量与真实偏移量之差（精度）
+- 被判为错误时钟的服务器
+- test_all_servers 的耗时和各状态的服务器数量
+
+    python benchmarks/bench_ntp_client.py
+    python benchmarks/bench_ntp_client.py --scenario lossy falseticker --runs 20
+
+多个服务器绑定在 127.0.0.1、127.0.0.2 ... 上，需要 Linux 的 127.0.0.0/8 回环；
+其他系统上每个场景只能使用一个服务器。
+"""
+import argparse
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timer_core import NTPTimeSync, percentile
+from ntp_responder import SNTPResponder
+
+NAN = float('nan')  # 没有样本时显示的值
+
+SCENARIOS = {
+    # 场景名 -> 各服务器相对基准的设置
+    'clean': [dict(delay=0.010, jitter=0.001)] * 4,
+    'jittery': [dict(delay=0.030, jitter=0.020)] * 4,
+    'lossy': [dict(delay=0.010, jitter=0.005, loss=0.3)] * 4,
+    'falseticker': [dict(delay=0.010, jitter=0.002)] * 3 + [dict(delay=0.010, extra_offset=1.5)],
+    'kod': [dict(delay=0.010, jitter=0.002)] * 3 + [dict(delay=0.010, kiss='RATE')],
+}
+
+
+def loopback_hosts(count):
+    """返回可以绑定的回环地址，不支持 127.0.0.2 等地址时只返回 127.0.0.1"""
+    try:
+        probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        probe.bind(('127.0.0.2', 0))
+        probe.close()
+    except OSError:
+        return ['127.0.0.1']
+    return [f'127.0.0.{i + 1}' for i in range(count)]
+
+
+def start_responders(configs, offset, seed):
+    hosts = loopback_hosts(len(configs))
+    responders = []
+    port = 0
+    for i, (host, config) in enumerate(zip(hosts, configs)):
+        config = dict(config)
+        extra = config.pop('extra_offset', 0.0)
+        responder = SNTPResponder(host, port, offset=offset + extra, seed=seed + i, **config)
+        responder.start()
+        port = responder.port  # 其余服务器绑定同一个端口
+        responders.append(responder)
+    return responders
+
+
+def run_scenario(name, args):
+    responders = start_responders(SCENARIOS[name], args.offset, args.seed)
+    servers = [responder.host for responder in responders]
+    NTPTimeSync.NTP_PORT = responders[0].port
+    try:
+        sync_times = []
+        errors_ms = []
+        failures = 0
+        falsetickers = set()
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            result = NTPTimeSync.get_ntp_time(servers, timeout=args.timeout)
+            sync_times.append(time.perf_counter() - start)
+            if result is None:
+                failures += 1
+                continue
+            errors_ms.append(abs(result['offset'] - args.offset) * 1000)
+            falsetickers.update(result['falsetickers'])
+
+        start = time.perf_counter()
+        tested = NTPTimeSync.test_all_servers(servers, timeout=args.timeout)
+        test_time = time.perf_counter() - start
+        statuses = {}
+        for item in tested:
+            statuses[item['status']] = statuses.get(item['status'], 0) + 1
+    finally:
+        for responder in responders:
+            responder.stop()
+
+    print(f"\n=== {name}: {len(servers)} 个服务器，{args.runs} 次同步 ===")
+    print(f"同步耗时: p50={percentile(sync_times, 0.5) * 1000:.1f}ms  "
+          f"p95={percentile(sync_times, 0.95) * 1000:.1f}ms  max={max(sync_times) * 1000:.1f}ms")
+    print(f"偏移误差: p50={percentile(errors_ms, 0.5, NAN):.3f}ms  p95={percentile(errors_ms, 0.95, NAN):.3f}ms  "
+          f"max={max(errors_ms, default=NAN):.3f}ms  失败 {failures} 次")
+    print(f"错误时钟: {', '.join(sorted(falsetickers)) or '无'}")
+    print(f"服务器测试: {test_time * 1000:.1f}ms  "
+          + '  '.join(f"{status}={count}" for status, count in statuses.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='NTP客户端精度与耗时基准（本地应答器）')
+    parser.add_argument('--scenario', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--runs', type=int, default=10, help='每个场景的同步次数')
+    parser.add_argument('--offset', type=float, default=0.25, help='应答器比本机快多少秒')
+    parser.add_argument('--timeout', type=float, default=NTPTimeSync.TIMEOUT, help='每次同步的总超时（秒）')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    for name in args.scenario:
+        run_scenario(name, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+"""计时精度基准：测量显示跳变和闹钟触发的延迟，以及每计时器小时的CPU开销
+
+对每个引擎同时运行若干个倒计时，记录：
+- 每次显示秒数跳变时，界面线程实际收到更新的时间比理论跳变时刻晚多少
+  （延迟分布直方图和百分位数）
+- 闹钟信号比倒计时理论结束时刻晚多少
+- 每个计时器运行一小时消耗的CPU时间（已扣除模拟负载本身的CPU）
+
+可以用 --load-ms/--load-interval-ms 在界面线程（或事件循环）上模拟繁忙的界面，
+观察精度如何随负载变差。Qt 引擎在 offscreen 平台下运行，不需要显示器：
+
+    python benchmarks/bench_timer_jitter.py
+    python benchmarks/bench_timer_jitter.py --engine qt qt-poll --timers 50 --duration 60 --load-ms 30
+
+引擎：
+    qt       SimpleTimer.TimerThread（共享调度线程 + 跨线程信号），逐秒跳变
+    qt-poll  SimpleTimer.TimerThread，旧的 100 毫秒轮询模式
+    core     timer_core.ScheduledTimer，回调直接在调度线程执行（不需要Qt）
+    asyncio  timer_async.AsyncTimer，在 asyncio 事件循环上运行（不需要Qt）
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timer_core import NS_PER_SECOND, SYSTEM_CLOCK, ScheduledTimer, TimerScheduler, percentile
+from timer_async import AsyncTimer
+
+HISTOGRAM_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100]
+NAN = float('nan')  # 没有样本时显示的值
+
+
+def parse_hms(time_str):
+    hours, mins, secs = (int(part) for part in time_str.split(':'))
+    return hours * 3600 + mins * 60 + secs
+
+
+def busy_wait(milliseconds):
+    """占用当前线程的CPU，返回实际消耗的线程CPU时间（秒）"""
+    cpu_start = time.thread_time()
+    end = time.perf_counter() + milliseconds / 1000
+    while time.perf_counter() < end:
+        pass
+    return time.thread_time() - cpu_start
+
+
+class Recorder:
+    """收集一个引擎运行期间的延迟样本"""
+
+    def __init__(self, duration):
+        self.duration = duration
+        self.start_ns = {}
+        self.last_value = {}
+        self.tick_lateness_ms = []
+        self.alarm_lateness_ms = []
+        self.load_cpu = 0.0
+
+    def on_start(self, key, start_ns):
+        self.start_ns[key] = start_ns
+
+    def on_update(self, key, time_str):
+        now_ns = SYSTEM_CLOCK.monotonic_ns()
+        value = parse_hms(time_str)
+        if self.last_value.get(key) == value:
+            return  # 只有进度变化，不是秒数跳变
+        self.last_value[key] = value
+        if value >= self.duration:
+            return  # 开始时的第一帧没有对应的跳变时刻
+        # 倒计时剩余时间向下取整，显示 value 的时刻是剩余时间刚小于 value+1
+        due_ns = self.start_ns[key] + (self.duration - value - 1) * NS_PER_SECOND
+        self.tick_lateness_ms.append((now_ns - due_ns) / 1e6)
+
+    def on_alarm(self, key):
+        due_ns = self.start_ns[key] + self.duration * NS_PER_SECOND
+        self.alarm_lateness_ms.append((SYSTEM_CLOCK.monotonic_ns() - due_ns) / 1e6)
+
+
+def run_qt(args, tick_mode):
+    try:
+        from PyQt5.QtCore import QTimer
+        from PyQt5.QtWidgets import QApplication
+        from SimpleTimer import TimerThread
+    except ImportError as e:
+        print(f"跳过 Qt 引擎（{e}）")
+        return None
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    recorder = Recorder(args.duration)
+    threads = []
+
+    load_timer = None
+    if args.load_ms > 0:
+        def apply_load():
+            recorder.load_cpu += busy_wait(args.load_ms)
+        load_timer = QTimer()
+        load_timer.timeout.connect(apply_load)
+        load_timer.start(args.load_interval_ms)
+
+    cpu_start = time.process_time()
+    for i in range(args.timers):
+        thread = TimerThread(args.duration, True, tick_mode=tick_mode)
+        thread.update_signal.connect(lambda t, p, key=i: recorder.on_update(key, t))
+        thread.alarm_signal.connect(lambda key=i: recorder.on_alarm(key))
+        thread.start()
+        recorder.on_start(i, thread.timer.start_ns)
+        threads.append(thread)
+
+    QTimer.singleShot(int((args.duration + 1.5) * 1000), app.quit)
+    app.exec_()
+    cpu = time.process_time() - cpu_start - recorder.load_cpu
+    if load_timer:
+        load_timer.stop()
+    for thread in threads:
+        thread.stop()
+    return recorder, cpu
+
+
+def run_core(args):
+    recorder = Recorder(args.duration)
+    scheduler = TimerScheduler()
+    stop_load = threading.Event()
+
+    def load_thread():
+        # 没有界面线程时用一个抢占GIL的线程模拟负载
+        cpu = 0.0
+        while not stop_load.wait(args.load_interval_ms / 1000):
+            cpu += busy_wait(args.load_ms)
+        recorder.load_cpu = cpu
+
+    loader = None
+    if args.load_ms > 0:
+        loader = threading.Thread(target=load_thread, daemon=True)
+        loader.start()
+
+    cpu_start = time.process_time()
+    timers = []
+    for i in range(args.timers):
+        timer = ScheduledTimer(
+            args.duration, True, scheduler=scheduler,
+            on_update=lambda t, p, key=i: recorder.on_update(key, t),
+            on_alarm=lambda key=i: recorder.on_alarm(key),
+        )
+        timer.start()
+        recorder.on_start(i, timer.start_ns)
+        timers.append(timer)
+
+    time.sleep(args.duration + 1.5)
+    stop_load.set()
+    if loader:
+        loader.join()
+    cpu = time.process_time() - cpu_start - recorder.load_cpu
+    scheduler.shutdown(1)
+    return recorder, cpu
+
+
+def run_asyncio(args):
+    recorder = Recorder(args.duration)
+
+    async def apply_load():
+        while True:
+            await asyncio.sleep(args.load_interval_ms / 1000)
+            recorder.load_cpu += busy_wait(args.load_ms)
+
+    async def consume(key, timer):
+        async for time_str, _ in timer.ticks():
+            recorder.on_update(key, time_str)
+        if await timer.finished():
+            recorder.on_alarm(key)
+
+    async def main():
+        load_task = asyncio.ensure_future(apply_load()) if args.load_ms > 0 else None
+        tasks = []
+        for i in range(args.timers):
+            timer = AsyncTimer(args.duration, True)
+            tasks.append(asyncio.ensure_future(consume(i, timer)))
+            await asyncio.sleep(0)  # 让 consume 先订阅 ticks()
+            timer.start()
+            recorder.on_start(i, timer.timer.start_ns)
+        await asyncio.gather(*tasks)
+        await asyncio.sleep(1.5)
+        if load_task:
+            load_task.cancel()
+
+    cpu_start = time.process_time()
+    asyncio.run(main())
+    return recorder, time.process_time() - cpu_start - recorder.load_cpu
+
+
+def histogram(values):
+    counts = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+    for value in values:
+        for i, upper in enumerate(HISTOGRAM_BUCKETS_MS):
+            if value < upper:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+    labels = [f"<{upper}ms" for upper in HISTOGRAM_BUCKETS_MS] + [f">={HISTOGRAM_BUCKETS_MS[-1]}ms"]
+    return list(zip(labels, counts))
+
+
+def report(name, args, result):
+    recorder, cpu = result
+    ticks = recorder.tick_lateness_ms
+    alarms = recorder.alarm_lateness_ms
+    timer_hours = args.timers * (args.duration + 1.5) / 3600
+
+    print(f"\n=== {name}: {args.timers} 个倒计时 x {args.duration} 秒，"
+          f"负载 {args.load_ms}ms/{args.load_interval_ms}ms ===")
+    print(f"秒跳变延迟: {len(ticks)} 个样本  "
+          f"p50={percentile(ticks, 0.5, NAN):.2f}ms  p90={percentile(ticks, 0.9, NAN):.2f}ms  "
+          f"p99={percentile(ticks, 0.99, NAN):.2f}ms  max={max(ticks, default=NAN):.2f}ms")
+    total = len(ticks) or 1
+    for label, count in histogram(ticks):
+        bar = '#' * int(40 * count / total)
+        print(f"  {label:>8} {count:>7} {bar}")
+    print(f"闹钟延迟: {len(alarms)}/{args.timers} 触发  "
+          f"p50={percentile(alarms, 0.5, NAN):.2f}ms  p99={percentile(alarms, 0.99, NAN):.2f}ms  "
+          f"max={max(alarms, default=NAN):.2f}ms")
+    print(f"CPU: {cpu:.3f} 秒，合 {cpu / timer_hours:.3f} 秒/计时器小时")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='计时精度与开销基准')
+    parser.add_argument('--engine', nargs='+', default=['qt', 'qt-poll', 'core', 'asyncio'],
+                        choices=['qt', 'qt-poll', 'core', 'asyncio'])
+    parser.add_argument('--timers', type=int, default=20, help='同时运行的倒计时数量')
+    parser.add_argument('--duration', type=int, default=20, help='每个倒计时的时长（秒）')
+    parser.add_argument('--load-ms', type=float, default=0,
+                        help='每次模拟界面负载占用的毫秒数（0 表示无负载）')
+    parser.add_argument('--load-interval-ms', type=int, default=100,
+                        help='模拟界面负载的间隔（毫秒）')
+    args = parser.parse_args()
+
+    runners = {
+        'qt': lambda: run_qt(args, 'second'),
+        'qt-poll': lambda: run_qt(args, 'poll'),
+        'core': lambda: run_core(args),
+        'asyncio': lambda: run_asyncio(args),
+    }
+    for name in args.engine:
+        result = runners[name]()
+        if result is not None:
+            report(name, args, result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""计时队列基准：比较最小堆（TimerHeap）与分层时间轮（TimingWheel）
+
+分别测量插入、取消和到期处理的吞吐量（每秒操作数）。到期阶段按调度器的
+实际用法反复执行 next_deadline() + pop_due()，直到队列清空。
+
+用法：
+    python benchmarks/bench_timer_queues.py
+    python benchmarks/bench_timer_queues.py --sizes 1000 100000 --span 3600
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timer_core import NS_PER_SECOND, TimerHeap, TimingWheel
+
+
+class DummyTimer:
+    """只带令牌的占位计时器"""
+
+    __slots__ = ('_token',)
+
+    def __init__(self):
+        self._token = 0
+
+
+def run_case(queue_factory, size, span_ns, cancel_ratio, seed):
+    rng = random.Random(seed)
+    start_ns = 0
+    queue = queue_factory(start_ns)
+    timers = [DummyTimer() for _ in range(size)]
+    deadlines = [start_ns + rng.randrange(1, span_ns) for _ in range(size)]
+    cancelled = rng.sample(timers, int(size * cancel_ratio))
+
+    t0 = time.perf_counter()
+    for timer, deadline in zip(timers, deadlines):
+        timer._token += 1
+        queue.push(deadline, timer, timer._token)
+    insert_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for timer in cancelled:
+        timer._token += 1
+        queue.discard(timer)
+    cancel_time = time.perf_counter() - t0
+
+    expired = 0
+    t0 = time.perf_counter()
+    while True:
+        deadline = queue.next_deadline()
+        if deadline is None:
+            break
+        expired += len(queue.pop_due(deadline))
+    expire_time = time.perf_counter() - t0
+
+    expected = size - len(cancelled)
+    if expired != expected:
+        raise RuntimeError(f"到期数量不符: {expired} != {expected}")
+
+    return {
+        'insert': size / insert_time if insert_time else float('inf'),
+        'cancel': len(cancelled) / cancel_time if cancel_time else float('inf'),
+        'expire': expired / expire_time if expire_time else float('inf'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='计时队列基准（堆 vs 分层时间轮）')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000],
+                        help='计时器数量（默认 1k/100k/1M）')
+    parser.add_argument('--span', type=float, default=86400,
+                        help='截止时间分布范围（秒，默认 1 天）')
+    parser.add_argument('--cancel-ratio', type=float, default=0.5,
+                        help='插入后取消的比例（默认 0.5）')
+    parser.add_argument('--wheel-tick-ms', type=float, default=1.0,
+                        help='时间轮刻度（毫秒，默认 1）；刻度越粗，同一刻度批量到期的计时器越多')
+    parser.add_argument('--seed', type=int, default=20260628)
+    args = parser.parse_args()
+
+    wheel_tick_ns = int(args.wheel_tick_ms * 1_000_000)
+    backends = [
+        ('heap', lambda start_ns: TimerHeap()),
+        ('wheel', lambda start_ns: TimingWheel(tick_ns=wheel_tick_ns, start_ns=start_ns)),
+    ]
+    span_ns = int(args.span * NS_PER_SECOND)
+
+    print(f"{'数量':>10} {'后端':>6} {'插入/秒':>14} {'取消/秒':>14} {'到期/秒':>14}")
+    for size in args.sizes:
+        for name, factory in backends:
+            result = run_case(factory, size, span_ns, args.cancel_ratio, args.seed)
+            print(f"{size:>10} {name:>6} {result['insert']:>14,.0f} "
+                  f"{result['cancel']:>14,.0f} {result['expire']:>14,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""本地SNTP应答器
+
+在回环地址上模拟一个NTP服务器，用于在没有网络的环境中验证和测量
+NTPTimeSync：可以设置时间偏移、网络延迟、延迟抖动、丢包率，以及返回
+kiss-of-death（拒绝服务）应答。
+
+    with SNTPResponder(offset=0.25, delay=0.02, jitter=0.005) as server:
+        NTPTimeSync.NTP_PORT = server.port
+        print(NTPTimeSync.get_ntp_time([server.host]))
+
+Linux 上整个 127.0.0.0/8 都是回环地址，多个应答器可以绑定 127.0.0.2、
+127.0.0.3 ... 的同一个端口，模拟一组时间各不相同的服务器。
+"""
+import heapq
+import random
+import select
+import socket
+import struct
+import threading
+import time as systime
+
+from timer_core import NTPTimeSync
+
+__all__ = ['SNTPResponder']
+
+
+class SNTPResponder:
+    """回环SNTP应答器
+
+    offset   应答时间比本机时间快多少秒
+    delay    往返网络延迟（秒），去程和回程各一半
+    jitter   每个方向额外增加 0~jitter 秒的随机排队延迟
+    loss     请求被丢弃的概率
+    kiss     不为 None 时所有应答都是 stratum 0 的拒绝服务应答，值为4字符代码（如 'RATE'）
+    """
+
+    PROCESSING_TIME = 0.0001  # 服务器从收到请求到发出应答的时间（T3 - T2）
+
+    def __init__(self, host='127.0.0.1', port=0, offset=0.0, delay=0.0, jitter=0.0,
+                 loss=0.0, kiss=None, stratum=2, leap=0, seed=None):
+        self.host = host
+        self.port = port
+        self.offset = offset
+        self.delay = delay
+        self.jitter = jitter
+        self.loss = loss
+        self.kiss = kiss
+        self.stratum = stratum
+        self.leap = leap
+        self.requests = 0  # 收到的请求数
+        self.replies = 0  # 发出的应答数
+        self._random = random.Random(seed)
+        self._sock = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._outgoing = []  # (发送时间, 序号, 应答, 地址)
+        self._sequence = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        """绑定端口并在后台线程中开始应答；port 为 0 时使用系统分配的端口"""
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind((self.host, self.port))
+        self.port = self._sock.getsockname()[1]
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self._sock:
+            self._sock.close()
+            self._sock = None
+
+    def _one_way_delay(self):
+        return self.delay / 2 + self._random.uniform(0, self.jitter)
+
+    def _run(self):
+        while not self._stop.is_set():
+            now = systime.time()
+            while self._outgoing and self._outgoing[0][0] <= now:
+                _, _, reply, addr = heapq.heappop(self._outgoing)
+                try:
+                    self._sock.sendto(reply, addr)
+                    self.replies += 1
+                except OSError as e:
+                    print(f"SNTP应答发送失败: {e}")
+            wait = self._outgoing[0][0] - now if self._outgoing else 0.05
+            readable, _, _ = select.select([self._sock], [], [], min(wait, 0.05))
+            if not readable:
+                continue
+            try:
+                request, addr = self._sock.recvfrom(1024)
+            except OSError:
+                continue
+            received = systime.time()
+            self.requests += 1
+            if len(request) < 48 or self._random.random() < self.loss:
+                continue
+            # 按到达服务器、发出应答、回到客户端的时刻计算时间戳和实际发送时间
+            arrive = received + self._one_way_delay()
+            depart = arrive + self.PROCESSING_TIME
+            send_at = depart + self._one_way_delay()
+            reply = self._build_reply(request, arrive + self.offset, depart + self.offset)
+            self._sequence += 1
+            heapq.heappush(self._outgoing, (send_at, self._sequence, reply, addr))
+
+    def _build_reply(self, request, t2, t3):
+        version = (request[0] >> 3) & 0x7
+        if self.kiss is not None:
+            stratum = 0
+            refid = self.kiss.encode('ascii')[:4].ljust(4, b'\0')
+        else:
+            stratum = self.stratum
+            refid = b'LOCL'
+        header = struct.pack('!BBbb', (self.leap << 6) | (version << 3) | 4, stratum,
+                             request[2], -20)
+        to_ntp = NTPTimeSync._to_ntp_timestamp
+        return (header + 8 * b'\0' + refid + to_ntp(t3 - 1)
+                + request[40:48] + to_ntp(t2) + to_ntp(t3))
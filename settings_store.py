@@ -0,0 +1,206 @@
+"""多功能计时器设置存储（不依赖Qt）
+
+SettingsManager 负责内存中的设置和延迟合并写入，这里的存储类只负责把
+设置落到磁盘。存储类收到的值都已经编码为JSON文本（在持有设置锁时编码，
+避免界面线程同时修改列表），接口：
+
+    load()                 返回 {键: 值}
+    wants_full_write()     是否需要下次保存时写入全部设置
+    write_changes(encoded) 写入修改过的键 {键: JSON文本}
+    write_all(encoded)     用全部设置替换磁盘上的内容
+    close()
+
+两种实现：
+    JSONSettingsStore    设置文件 + 追加日志，原子替换（默认）
+    SQLiteSettingsStore  每个键一行，WAL 模式，只写入修改过的键
+"""
+import json
+import os
+import sys
+
+try:
+    import sqlite3
+    HAS_SQLITE = True
+except ImportError:
+    HAS_SQLITE = False
+
+__all__ = ['FSYNC_POLICIES', 'HAS_SQLITE', 'JSONSettingsStore', 'SQLiteSettingsStore']
+
+# fsync 策略：
+#     'always'   每次写入后都 fsync（默认，断电也不丢已保存的修改）
+#     'compact'  只在写入全部设置时 fsync
+#     'never'    从不 fsync，由操作系统决定何时落盘
+FSYNC_POLICIES = ('always', 'compact', 'never')
+
+
+class JSONSettingsStore:
+    """设置文件 + 追加日志
+
+    修改过的键以每行一条的形式追加到日志文件（设置文件名 + .journal），
+    加载时在设置文件之上重放；日志超过 JOURNAL_COMPACT_BYTES 时合并为新的
+    设置文件。设置文件总是先写入临时文件再原子替换，任何时刻磁盘上都是
+    一份完整的设置。
+    """
+
+    JOURNAL_COMPACT_BYTES = 64 * 1024  # 日志超过该大小时合并到设置文件
+
+    def __init__(self, settings_file, fsync='always'):
+        self.settings_file = settings_file
+        self.journal_file = settings_file + ".journal"
+        self.fsync = fsync
+        self._needs_compact = False
+
+    def exists(self):
+        return os.path.exists(self.settings_file) or os.path.exists(self.journal_file)
+
+    def load(self):
+        """加载设置文件并重放日志"""
+        settings = {}
+        try:
+            if os.path.exists(self.settings_file):
+                with open(self.settings_file, 'r', encoding='utf-8') as f:
+                    settings.update(json.load(f))
+        except Exception as e:
+            print(f"加载设置失败: {e}")
+            # 保留损坏的文件以便手动恢复，日志中的修改仍然会被重放
+            try:
+                os.replace(self.settings_file, self.settings_file + ".corrupt")
+            except OSError:
+                pass
+            self._needs_compact = True
+
+        for key, value in self._read_journal():
+            settings[key] = value
+        return settings
+
+    def _read_journal(self):
+        """读取日志中的 (键, 值)，遇到不完整的行（写入时断电）就停止"""
+        entries = []
+        try:
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        entries.append((entry['k'], entry['v']))
+                    except (ValueError, KeyError, TypeError):
+                        print("设置日志末尾不完整，已忽略")
+                        # 之后追加的内容会接在残缺的行后面，下次保存时重写设置文件
+                        self._needs_compact = True
+                        break
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"读取设置日志失败: {e}")
+            self._needs_compact = True
+        if entries and os.path.getsize(self.journal_file) > self.JOURNAL_COMPACT_BYTES:
+            self._needs_compact = True
+        return entries
+
+    def wants_full_write(self):
+        return self._needs_compact
+
+    def write_changes(self, encoded):
+        lines = ''.join(f'{{"k": {json.dumps(key, ensure_ascii=False)}, "v": {value}}}\n'
+                        for key, value in encoded.items())
+        try:
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write(lines)
+                f.flush()
+                if self.fsync == 'always':
+                    os.fsync(f.fileno())
+                if f.tell() > self.JOURNAL_COMPACT_BYTES:
+                    self._needs_compact = True
+        except Exception:
+            # 追加到一半失败（磁盘满、I/O错误）时日志末尾可能是残缺的行，之后再追加的内容
+            # 在加载时会被丢弃；重试时改为写入完整的设置文件
+            self._needs_compact = True
+            raise
+
+    def write_all(self, encoded):
+        """原子地写入完整的设置文件，然后清空已经合并进去的日志"""
+        data = '{\n' + ',\n'.join(f'  {json.dumps(key, ensure_ascii=False)}: {value}'
+                                  for key, value in encoded.items()) + '\n}\n'
+        temp_file = self.settings_file + ".tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            f.write(data)
+            f.flush()
+            if self.fsync != 'never':
+                os.fsync(f.fileno())
+        os.replace(temp_file, self.settings_file)
+        if self.fsync != 'never':
+            self._fsync_directory()
+        # 崩溃发生在替换之后、删除日志之前时，重放日志只会重复写入相同的值
+        try:
+            os.remove(self.journal_file)
+        except FileNotFoundError:
+            pass
+        self._needs_compact = False
+
+    def _fsync_directory(self):
+        """fsync 设置文件所在目录，保证重命名本身已落盘（Windows 不支持，跳过）"""
+        if sys.platform == 'win32':
+            return
+        fd = os.open(os.path.dirname(os.path.abspath(self.settings_file)), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def retire(self):
+        """迁移到其他存储后把文件改名保留，不再被加载"""
+        for path in (self.settings_file, self.journal_file):
+            if os.path.exists(path):
+                os.replace(path, path + ".migrated")
+
+    def close(self):
+        pass
+
+
+class SQLiteSettingsStore:
+    """SQLite 设置存储：每个键一行（值为JSON文本），WAL 模式
+
+    保存时只写入修改过的键，写入量与修改量成正比，与设置总大小无关。
+    连接在多个线程中使用（延迟写入在后台线程执行），由 SettingsManager
+    的写锁保证同一时间只有一个线程写入。
+    """
+
+    SYNCHRONOUS = {'always': 'FULL', 'compact': 'NORMAL', 'never': 'OFF'}
+
+    def __init__(self, database_file, fsync='always'):
+        if not HAS_SQLITE:
+            raise RuntimeError("当前Python没有 sqlite3 模块，无法使用 SQLite 设置存储")
+        self.database_file = database_file
+        self._conn = sqlite3.connect(database_file, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(f'PRAGMA synchronous={self.SYNCHRONOUS[fsync]}')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+
+    def is_empty(self):
+        return self._conn.execute('SELECT 1 FROM settings LIMIT 1').fetchone() is None
+
+    def load(self):
+        settings = {}
+        for key, value in self._conn.execute('SELECT key, value FROM settings'):
+            try:
+                settings[key] = json.loads(value)
+            except ValueError as e:
+                print(f"加载设置 {key} 失败: {e}")
+        return settings
+
+    def wants_full_write(self):
+        return False
+
+    def write_changes(self, encoded):
+        with self._conn:
+            self._conn.execute('BEGIN')
+            self._conn.executemany('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)',
+                                   encoded.items())
+
+    def write_all(self, encoded):
+        with self._conn:
+            self._conn.execute('BEGIN')
+            self._conn.execute('DELETE FROM settings')
+            self._conn.executemany('INSERT INTO settings (key, value) VALUES (?, ?)', encoded.items())
+
+    def close(self):
+        self._conn.close()
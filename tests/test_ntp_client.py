@@ -0,0 +1,91 @@
+"""NTP客户端：用本地SNTP应答器验证选择算法、拒绝服务处理和同步精度（不需要网络）"""
+import socket
+import threading
+
+import pytest
+
+from ntp_responder import SNTPResponder
+from timer_core import NTPTimeSync
+
+OFFSET = 0.25  # 应答器比本机快的秒数
+TOLERANCE = 0.005  # 回环上同步结果与真实偏移量允许的误差（秒）
+
+
+def _multiple_loopback_addresses():
+    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        probe.bind(('127.0.0.2', 0))
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+pytestmark = pytest.mark.skipif(not _multiple_loopback_addresses(),
+                                reason='需要 127.0.0.0/8 回环地址（Linux）')
+
+
+@pytest.fixture
+def responders(monkeypatch):
+    """启动一组绑定在 127.0.0.1、127.0.0.2 ... 同一端口上的应答器"""
+    started = []
+
+    def start(*configs):
+        port = 0
+        for i, config in enumerate(configs):
+            config = dict(config)
+            extra = config.pop('extra_offset', 0.0)
+            responder = SNTPResponder(f'127.0.0.{i + 1}', port, offset=OFFSET + extra, seed=i, **config)
+            responder.start()
+            port = responder.port
+            started.append(responder)
+        monkeypatch.setattr(NTPTimeSync, 'NTP_PORT', port)
+        return [responder.host for responder in started]
+
+    yield start
+    for responder in started:
+        responder.stop()
+
+
+def test_offset_error_within_tolerance(responders):
+    servers = responders(*[dict(delay=0.010, jitter=0.001)] * 4)
+    result = NTPTimeSync.get_ntp_time(servers, timeout=3)
+    assert result is not None
+    assert abs(result['offset'] - OFFSET) < TOLERANCE
+    assert result['falsetickers'] == []
+
+
+def test_falseticker_is_rejected(responders):
+    servers = responders(*[dict(delay=0.010, jitter=0.001)] * 3, dict(delay=0.010, extra_offset=1.5))
+    result = NTPTimeSync.get_ntp_time(servers, timeout=3)
+    assert result is not None
+    assert result['falsetickers'] == ['127.0.0.4']
+    assert '127.0.0.4' not in result['servers']
+    assert abs(result['offset'] - OFFSET) < TOLERANCE
+
+
+def test_kiss_of_death_reports_error_status(responders):
+    servers = responders(*[dict(delay=0.010)] * 2, dict(delay=0.010, kiss='RATE'))
+    statuses = {item['server']: item['status'] for item in NTPTimeSync.test_all_servers(servers, timeout=2)}
+    assert statuses['127.0.0.1'] == statuses['127.0.0.2'] == '可用'
+    assert statuses['127.0.0.3'].startswith('错误') and 'RATE' in statuses['127.0.0.3']
+    result = NTPTimeSync.get_ntp_time(servers, timeout=3)
+    assert result is not None and '127.0.0.3' not in result['servers']
+
+
+def test_concurrent_queries_share_the_socket_pool(responders):
+    # 两个查询同时经由共享套接字发出，应答必须按起始时间戳分发回各自的查询
+    servers = responders(dict(delay=0.030), dict(delay=0.030, extra_offset=0.5))
+    results = {}
+
+    def query(server):
+        results[server] = NTPTimeSync.query_servers([server], timeout=2)[0]
+
+    threads = [threading.Thread(target=query, args=(server,)) for server in servers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert abs(results['127.0.0.1']['offset'] - OFFSET) < TOLERANCE
+    assert abs(results['127.0.0.2']['offset'] - (OFFSET + 0.5)) < TOLERANCE
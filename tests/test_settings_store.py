@@ -0,0 +1,63 @@
+"""设置存储的崩溃恢复：残缺的日志行、损坏的设置文件"""
+import errno
+import json
+import os
+
+import pytest
+
+import settings_store
+from settings_store import JSONSettingsStore
+
+
+def encode(settings):
+    return {key: json.dumps(value, ensure_ascii=False) for key, value in settings.items()}
+
+
+def test_torn_journal_line_is_ignored_and_forces_compaction(tmp_path):
+    path = str(tmp_path / 'timer_settings.json')
+    store = JSONSettingsStore(path)
+    store.write_all(encode({'volume': 100, 'muted': False}))
+    store.write_changes(encode({'volume': 30}))
+    with open(store.journal_file, 'a', encoding='utf-8') as f:
+        f.write('{"k": "muted", "v": tr')  # 写入时断电留下的半行
+
+    reloaded = JSONSettingsStore(path)
+    assert reloaded.load() == {'volume': 30, 'muted': False}
+    # 再追加会接在残缺的行后面而在下次加载时丢失，必须改为重写设置文件
+    assert reloaded.wants_full_write()
+    reloaded.write_all(encode({'volume': 30, 'muted': True}))
+    assert not os.path.exists(store.journal_file)
+    assert JSONSettingsStore(path).load() == {'volume': 30, 'muted': True}
+
+
+def test_failed_append_retries_as_full_write(tmp_path, monkeypatch):
+    path = str(tmp_path / 'timer_settings.json')
+    store = JSONSettingsStore(path)
+    store.write_all(encode({'volume': 100}))
+
+    def fail_fsync(fd):
+        raise OSError(errno.ENOSPC, 'No space left on device')
+
+    monkeypatch.setattr(settings_store.os, 'fsync', fail_fsync)
+    with pytest.raises(OSError):
+        store.write_changes(encode({'volume': 40}))
+    monkeypatch.undo()
+
+    assert store.wants_full_write()
+    with open(store.journal_file, 'a', encoding='utf-8') as f:
+        f.write('{"k": "vol')  # 失败时可能留下的残缺行
+    store.write_all(encode({'volume': 40, 'muted': True}))
+    assert JSONSettingsStore(path).load() == {'volume': 40, 'muted': True}
+
+
+def test_corrupt_snapshot_is_kept_aside_and_journal_replayed(tmp_path):
+    path = str(tmp_path / 'timer_settings.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"volume": 10, "mut')
+    with open(path + '.journal', 'w', encoding='utf-8') as f:
+        f.write('{"k": "sound_file", "v": "bell.mp3"}\n')
+
+    store = JSONSettingsStore(path)
+    assert store.load() == {'sound_file': 'bell.mp3'}
+    assert os.path.exists(path + '.corrupt')
+    assert store.wants_full_write()
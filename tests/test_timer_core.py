@@ -0,0 +1,78 @@
+"""计时引擎：虚拟时钟回放和两种截止时间队列的一致性"""
+import random
+
+from timer_core import NS_PER_SECOND, ScheduledTimer, TimerHeap, TimerScheduler, TimingWheel, VirtualClock
+
+PRESET_3H = 10800  # "3小时" 预设
+
+
+def test_3h_countdown_replay_with_pause():
+    clock = VirtualClock()
+    scheduler = TimerScheduler(clock=clock)
+    updates = []
+    alarms = []
+    timer = ScheduledTimer(PRESET_3H, is_countdown=True, scheduler=scheduler,
+                           on_update=lambda text, progress: updates.append((text, progress)),
+                           on_alarm=lambda: alarms.append(clock.monotonic_ns()))
+    timer.start()
+    scheduler.advance(3600.4)
+    assert updates[-1] == ('01:59:59', 33)
+
+    timer.pause()
+    # 暂停期间没有任何唤醒，显示冻结
+    assert scheduler.advance(1800) == 0
+    assert timer.remaining == PRESET_3H - 3600.4
+
+    timer.resume()
+    scheduler.advance(PRESET_3H)
+    assert len(alarms) == 1
+    # 闹钟在开始后 3 小时 + 暂停的 30 分钟触发，最多晚 TICK_EPSILON_NS
+    late_ns = alarms[0] - (PRESET_3H + 1800) * NS_PER_SECOND
+    assert 0 <= late_ns <= ScheduledTimer.TICK_EPSILON_NS
+    assert updates[0] == ('03:00:00', 0)
+    assert updates[-1] == ('00:00:00', 100)
+    # 03:00:00 到 00:00:01 每秒一次更新（进度跳变与秒数跳变同时发生，不会额外更新），
+    # 最后一秒显示 ('00:00:00', 99)，到点时再发出 ('00:00:00', 100)
+    assert len(updates) == PRESET_3H + 2
+    assert timer.is_finished and not timer.is_running
+
+
+class _Entry:
+    def __init__(self, name):
+        self.name = name
+        self._token = 0
+
+    def __repr__(self):
+        return self.name
+
+
+def test_heap_and_wheel_pop_the_same_entries():
+    rng = random.Random(2024)
+    tick_ns = 1_000_000
+    heap = TimerHeap(start_ns=0)
+    wheel = TimingWheel(tick_ns=tick_ns, start_ns=0)
+    entries = [_Entry(f't{i}') for i in range(300)]
+    now = 0
+    for _ in range(2000):
+        entry = rng.choice(entries)
+        action = rng.random()
+        if action < 0.6:
+            # 截止时间覆盖从几毫秒到超出时间轮范围（溢出表）的跨度
+            span = rng.choice([10 * tick_ns, 5 * NS_PER_SECOND, 3600 * NS_PER_SECOND,
+                               900 * 86400 * NS_PER_SECOND])
+            deadline = now + rng.randrange(0, span) // tick_ns * tick_ns
+            entry._token += 1
+            heap.push(deadline, entry, entry._token)
+            wheel.push(deadline, entry, entry._token)
+        elif action < 0.7:
+            entry._token += 1
+            heap.discard(entry)
+            wheel.discard(entry)
+        else:
+            now += rng.choice([tick_ns, 7 * tick_ns, NS_PER_SECOND, 600 * NS_PER_SECOND])
+            # 截止时间是刻度的整数倍，两种队列在同一时刻到期的条目必须完全相同
+            assert sorted(heap.pop_due(now), key=repr) == sorted(wheel.pop_due(now), key=repr)
+
+    now += 1000 * 86400 * NS_PER_SECOND
+    assert sorted(heap.pop_due(now), key=repr) == sorted(wheel.pop_due(now), key=repr)
+    assert heap.next_deadline() is None and wheel.next_deadline() is None
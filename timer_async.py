@@ -0,0 +1,158 @@
+"""多功能计时器 asyncio 接口
+
+在事件循环所在线程上直接驱动 ScheduledTimer，不需要工作线程，也没有跨线程
+信号。图形界面通过 qasync 把 Qt 事件循环作为 asyncio 循环使用时，计时回调和
+界面刷新在同一个线程里完成；脚本中也可以用 asyncio.run 协作式地驱动大量计时器：
+
+    async def main():
+        timer = AsyncTimer(300, is_countdown=True)
+        timer.start()
+        async for time_str, progress in timer.ticks():
+            print(time_str, progress)
+        await timer.finished()
+
+    asyncio.run(main())
+
+不传 loop 时使用当前正在运行的事件循环，因此只能在协程中创建；在循环
+启动之前创建（如图形界面中的 qasync 循环）需要显式传入 loop。
+"""
+import asyncio
+
+from timer_core import NS_PER_SECOND, SYSTEM_CLOCK, ScheduledTimer
+
+__all__ = ['AsyncioScheduler', 'AsyncTimer']
+
+
+class AsyncioScheduler:
+    """基于 asyncio 事件循环的调度器，接口与 TimerScheduler 相同
+
+    只能在事件循环所在线程中使用；loop 默认为当前正在运行的事件循环。
+    """
+
+    def __init__(self, loop=None):
+        self._loop = loop or asyncio.get_running_loop()
+        self._handles = {}  # 计时器 -> asyncio.TimerHandle
+        # asyncio 循环按真实时间运行，只能使用系统时钟
+        self.clock = SYSTEM_CLOCK
+
+    def schedule(self, timer, deadline):
+        """安排计时器在 deadline（monotonic_ns）时刻被处理（会作废该计时器之前的安排）"""
+        self._cancel_handle(timer)
+        timer._token += 1
+        delay = max(0, deadline - self.clock.monotonic_ns()) / NS_PER_SECOND
+        self._handles[timer] = self._loop.call_later(delay, self._fire, timer, timer._token)
+
+    def cancel(self, timer):
+        """取消计时器的所有安排"""
+        timer._token += 1
+        self._cancel_handle(timer)
+
+    def pending_count(self):
+        return len(self._handles)
+
+    def _cancel_handle(self, timer):
+        handle = self._handles.pop(timer, None)
+        if handle is not None:
+            handle.cancel()
+
+    def _fire(self, timer, token):
+        if token != timer._token:
+            return
+        self._handles.pop(timer, None)
+        try:
+            next_deadline = timer._fire()
+        except Exception as e:
+            print(f"计时器回调出错: {e}")
+            next_deadline = None
+        # 回调期间被取消或重新安排过的计时器不再自动续期
+        if next_deadline is not None and token == timer._token:
+            self.schedule(timer, next_deadline)
+
+
+class AsyncTimer:
+    """asyncio 风格的计时器/倒计时
+
+    start/pause/resume/reset 的语义与界面上的按钮一致：reset 会停止计时，
+    正在等待 finished() 的协程得到 False，ticks() 迭代结束。
+    """
+
+    _DONE = object()  # ticks() 队列中的结束标记
+
+    def __init__(self, duration_seconds, is_countdown=False, clock=None,
+                 loop=None, tick_mode='second'):
+        self._loop = loop or asyncio.get_running_loop()
+        self._queues = []
+        self._finished = self._loop.create_future()
+        self.timer = ScheduledTimer(
+            duration_seconds, is_countdown,
+            clock=clock,
+            on_update=self._on_update,
+            on_alarm=self._on_alarm,
+            scheduler=AsyncioScheduler(self._loop),
+            tick_mode=tick_mode,
+        )
+
+    @property
+    def is_running(self):
+        return self.timer.is_running
+
+    @property
+    def is_paused(self):
+        return self.timer.is_paused
+
+    @property
+    def elapsed(self):
+        return self.timer.elapsed
+
+    @property
+    def remaining(self):
+        return self.timer.remaining
+
+    def start(self):
+        """开始（或重新开始）计时"""
+        if self._finished.done():
+            self._finished = self._loop.create_future()
+        self.timer.start()
+
+    def pause(self):
+        self.timer.pause()
+
+    def resume(self):
+        self.timer.resume()
+
+    def reset(self):
+        """停止并重置计时"""
+        self.timer.stop()
+        self._finish(False)
+
+    async def finished(self):
+        """等待计时结束：倒计时到点返回 True，被重置返回 False"""
+        return await asyncio.shield(self._finished)
+
+    async def ticks(self):
+        """异步迭代每一次显示变化，产出 (时间字符串, 进度)"""
+        if self._finished.done():
+            return
+        queue = asyncio.Queue()
+        self._queues.append(queue)
+        try:
+            while True:
+                item = await queue.get()
+                if item is self._DONE:
+                    return
+                yield item
+        finally:
+            self._queues.remove(queue)
+
+    def _on_update(self, time_str, progress):
+        for queue in self._queues:
+            queue.put_nowait((time_str, progress))
+
+    def _on_alarm(self):
+        self._finish(True)
+
+    def _finish(self, result):
+        if not self._finished.done():
+            self._finished.set_result(result)
+        for queue in self._queues:
+            queue.put_nowait(self._DONE)
@@ -0,0 +1,1838 @@
+"""多功能计时器核心：计时调度引擎、NTP校时与校正时钟
+
+本模块不依赖 PyQt5，可以在没有图形界面的服务器上单独导入使用；
+SimpleTimer.py 中的界面只是在其上包了一层 Qt 信号。
+"""
+import ctypes
+import ctypes.util
+import select
+import socket
+import struct
+import sys
+import collections
+import heapq
+import itertools
+import math
+import threading
+import time as systime
+from datetime import datetime
+
+__all__ = [
+    'NTP_SERVERS', 'NS_PER_SECOND', 'format_hms', 'percentile',
+    'SystemClock', 'VirtualClock', 'SYSTEM_CLOCK', 'TimerHeap', 'TimingWheel', 'TimerScheduler', 'ScheduledTimer',
+    'ResolverCache', 'NTPSocketPool', 'NTPTimeSync', 'NTPProbeStats', 'NTPServerHealth', 'NTPPollScheduler', 'KernelClockSource', 'NTPClock',
+]
+
+
+# NTP服务器列表
+NTP_SERVERS = [
+    # 新增：阿里云全套NTP服务器
+    'ntp1.aliyun.com',
+    'ntp2.aliyun.com',
+    'ntp3.aliyun.com',
+    'ntp4.aliyun.com',
+    'ntp5.aliyun.com',
+    'ntp6.aliyun.com',
+    'ntp7.aliyun.com',
+    'pool.ntp.org',            # NTP池项目
+    'cn.pool.ntp.org',         # 中国NTP池
+    'time.apple.com',         # 苹果时间服务器
+    'ntp.aliyun.com',         # 阿里云NTP服务器
+]
+
+
+NS_PER_SECOND = 1_000_000_000  # 单调时钟使用整数纳秒
+
+# "HH:MM:SS" 格式化缓存：24小时内的秒数按需填充，之后直接复用同一个字符串对象
+HMS_CACHE_SIZE = 24 * 3600
+_hms_cache = [None] * HMS_CACHE_SIZE
+
+
+def format_hms(total_seconds):
+    """把整数秒格式化为 HH:MM:SS（常用范围走缓存）"""
+    if 0 <= total_seconds < HMS_CACHE_SIZE:
+        time_str = _hms_cache[total_seconds]
+        if time_str is None:
+            mins, secs = divmod(total_seconds, 60)
+            hours, mins = divmod(mins, 60)
+            time_str = _hms_cache[total_seconds] = f"{hours:02d}:{mins:02d}:{secs:02d}"
+        return time_str
+    mins, secs = divmod(total_seconds, 60)
+    hours, mins = divmod(mins, 60)
+    return f"{hours:02d}:{mins:02d}:{secs:02d}"
+
+
+class SystemClock:
+    """真实时钟：单调时钟、墙上时间和睡眠都直接使用系统实现
+
+    Linux 的 CLOCK_MONOTONIC 在系统挂起期间停止走时，挂起再唤醒后倒计时会
+    "少走"挂起的时长；有 CLOCK_BOOTTIME 时改用它（同样不受系统时间调整影响，
+    但包含挂起时间）。
+    """
+
+    virtual = False
+    boottime = hasattr(systime, 'CLOCK_BOOTTIME')  # monotonic_ns 是否包含挂起时间
+
+    if boottime:
+        def monotonic_ns(self):
+            return systime.clock_gettime_ns(systime.CLOCK_BOOTTIME)
+    else:
+        def monotonic_ns(self):
+            return systime.monotonic_ns()
+
+    def boot_id(self):
+        """本次开机的标识，同一标识下 monotonic_ns 连续且包含挂起时间；无法确定时返回 None"""
+        if not self.boottime:
+            return None
+        try:
+            with open('/proc/sys/kernel/random/boot_id', encoding='ascii') as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def time(self):
+        return systime.time()
+
+    def sleep(self, seconds):
+        systime.sleep(seconds)
+
+
+class VirtualClock:
+    """可手动推进的虚拟时钟，用于测试和基准
+
+    时间只在调用 advance()/sleep()/set_ns() 时前进；配合
+    TimerScheduler.advance() 可以在几毫秒内回放数小时乃至数天的计时活动。
+    """
+
+    virtual = True
+
+    def __init__(self, start_ns=0, wall_start=1_700_000_000.0, boot_id='virtual'):
+        self._now_ns = start_ns
+        self._start_ns = start_ns
+        self._wall_start = wall_start
+        self._boot_id = boot_id
+        self._lock = threading.Lock()
+
+    def monotonic_ns(self):
+        return self._now_ns
+
+    def boot_id(self):
+        return self._boot_id
+
+    def time(self):
+        return self._wall_start + (self._now_ns - self._start_ns) / NS_PER_SECOND
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+    def advance(self, seconds):
+        self.set_ns(self._now_ns + int(round(seconds * NS_PER_SECOND)))
+
+    def set_ns(self, now_ns):
+        """把单调时钟设到 now_ns（不允许倒退）"""
+        with self._lock:
+            if now_ns > self._now_ns:
+                self._now_ns = now_ns
+
+
+SYSTEM_CLOCK = SystemClock()
+
+
+class TimerHeap:
+    """截止时间最小堆：插入 O(log n)，取消为惰性删除（旧条目在到达堆顶时丢弃）
+
+    队列条目只保存 (截止时间, 计时器, 令牌)；令牌与计时器当前的 _token 不一致
+    即视为已取消。
+    """
+
+    def __init__(self, start_ns=None):
+        self._heap = []  # (截止时间 monotonic_ns, 序号, 计时器, 令牌)
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, deadline, timer, token):
+        heapq.heappush(self._heap, (deadline, next(self._seq), timer, token))
+
+    def discard(self, timer):
+        # 堆顶失效时立即清理，避免工作线程为已取消的条目白白醒来一次
+        self._discard_stale_top()
+
+    def next_deadline(self):
+        """最早的有效截止时间，队列为空时返回 None"""
+        self._discard_stale_top()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """弹出所有已到期的有效条目，返回 [(计时器, 令牌)]"""
+        due = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            deadline, _, timer, token = heapq.heappop(heap)
+            if token == timer._token:
+                due.append((timer, token))
+        return due
+
+    def _discard_stale_top(self):
+        """丢弃堆顶已取消或已被重新安排的条目"""
+        heap = self._heap
+        while heap and heap[0][3] != heap[0][2]._token:
+            heapq.heappop(heap)
+
+
+class TimingWheel:
+    """分层时间轮：插入和取消 O(1)，同一刻度到期的计时器成批弹出
+
+    适合一次装入数万乃至上百万个计时器（排班、会议室预约等）。每层 64 个槽，
+    第 k 层一个槽覆盖 64**k 个刻度；计时器按截止时间与当前刻度最高的不同位
+    放入对应层，时间推进到上层槽的起点时再逐级下放。默认刻度 1 毫秒、6 层，
+    可覆盖约 795 天，更远的截止时间暂存在溢出表中。
+    截止时间向上取整到刻度，保证不会提前触发。
+    """
+
+    SLOT_BITS = 6
+    SLOTS = 1 << SLOT_BITS
+    SLOT_MASK = SLOTS - 1
+
+    def __init__(self, tick_ns=1_000_000, levels=6, start_ns=None):
+        self.tick_ns = tick_ns
+        self.levels = levels
+        if start_ns is None:
+            start_ns = SYSTEM_CLOCK.monotonic_ns()
+        self._now_tick = start_ns // tick_ns
+        # 每个槽是 {计时器: (截止时间, 令牌)}，便于 O(1) 取消
+        self._slots = [[_WheelSlot(level, index) for index in range(self.SLOTS)]
+                       for level in range(levels)]
+        # 每层一个 64 位占用位图，第 i 位表示第 i 个槽非空
+        self._occupied = [0] * levels
+        self._overflow = _WheelSlot()  # 超出最高层范围的条目
+        self._expired = _WheelSlot()  # 插入时已经到期的条目
+        self._where = {}  # 计时器 -> 所在的槽
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def push(self, deadline, timer, token):
+        if timer in self._where:
+            self.discard(timer)
+        self._insert(-(-deadline // self.tick_ns), timer, deadline, token)
+        self._count += 1
+
+    def discard(self, timer):
+        bucket = self._where.pop(timer, None)
+        if bucket is None:
+            return
+        del bucket[timer]
+        self._count -= 1
+        if not bucket and bucket.level is not None:
+            self._occupied[bucket.level] &= ~(1 << bucket.index)
+
+    def next_deadline(self):
+        """下一次需要处理的时间（到期或需要下放的刻度），空时返回 None"""
+        if self._expired:
+            return self._now_tick * self.tick_ns
+        tick = self._next_event_tick()
+        return None if tick is None else tick * self.tick_ns
+
+    def pop_due(self, now):
+        """把时间推进到 now，返回所有到期的 [(计时器, 令牌)]"""
+        due = self._take_expired()
+        target = now // self.tick_ns
+        slots0 = self._slots[0]
+        where = self._where
+        while self._now_tick < target:
+            tick = self._next_event_tick()
+            if tick is None or tick > target:
+                self._now_tick = target
+                break
+            self._now_tick = tick
+            if not tick & self.SLOT_MASK:
+                self._cascade(tick)
+            index = tick & self.SLOT_MASK
+            bucket = slots0[index]
+            if bucket:
+                self._occupied[0] &= ~(1 << index)
+                self._count -= len(bucket)
+                for timer, (_, token) in bucket.items():
+                    del where[timer]
+                    due.append((timer, token))
+                bucket.clear()
+        due.extend(self._take_expired())
+        return [(timer, token) for timer, token in due if token == timer._token]
+
+    def _take_expired(self):
+        expired = self._expired
+        if not expired:
+            return []
+        result = []
+        for timer, (_, token) in expired.items():
+            del self._where[timer]
+            result.append((timer, token))
+        self._count -= len(expired)
+        expired.clear()
+        return result
+
+    def _insert(self, tick, timer, deadline, token):
+        now = self._now_tick
+        if tick <= now:
+            bucket = self._expired
+        else:
+            # 截止刻度与当前刻度最高的不同位决定所在层
+            level = ((tick ^ now).bit_length() - 1) // self.SLOT_BITS
+            if level < self.levels:
+                index = (tick >> (self.SLOT_BITS * level)) & self.SLOT_MASK
+                bucket = self._slots[level][index]
+                self._occupied[level] |= 1 << index
+            else:
+                bucket = self._overflow
+        bucket[timer] = (deadline, token)
+        self._where[timer] = bucket
+
+    def _next_event_tick(self):
+        """最早有事件（到期或下放）的刻度"""
+        now = self._now_tick
+        for level, occupied in enumerate(self._occupied):
+            if not occupied:
+                continue
+            shift = self.SLOT_BITS * level
+            current = (now >> shift) & self.SLOT_MASK
+            upcoming = occupied >> (current + 1)
+            if upcoming:
+                index = current + (upcoming & -upcoming).bit_length()
+                base = (now >> (shift + self.SLOT_BITS)) << (shift + self.SLOT_BITS)
+                return base + (index << shift)
+        if self._overflow:
+            # 溢出表在最高层转完一圈时重新放回时间轮
+            span = self.SLOT_BITS * self.levels
+            return ((now >> span) + 1) << span
+        return None
+
+    def _cascade(self, tick):
+        """到达上层槽的起点时把其中的计时器下放到更低层"""
+        for level in range(1, self.levels):
+            shift = self.SLOT_BITS * level
+            if tick & ((1 << shift) - 1):
+                return
+            index = (tick >> shift) & self.SLOT_MASK
+            bucket = self._slots[level][index]
+            if bucket:
+                self._occupied[level] &= ~(1 << index)
+                self._reinsert(bucket)
+        if self._overflow and not tick & ((1 << (self.SLOT_BITS * self.levels)) - 1):
+            self._reinsert(self._overflow)
+
+    def _reinsert(self, bucket):
+        entries = list(bucket.items())
+        bucket.clear()
+        tick_ns = self.tick_ns
+        for timer, (deadline, token) in entries:
+            self._insert(-(-deadline // tick_ns), timer, deadline, token)
+
+
+class _WheelSlot(dict):
+    """时间轮中的一个槽，记录所在层和位置以便取消时维护占用位图"""
+
+    __slots__ = ('level', 'index')
+
+    def __init__(self, level=None, index=None):
+        super().__init__()
+        self.level = level
+        self.index = index
+
+
+class TimerScheduler:
+    """共享计时调度器：一个工作线程 + 截止时间队列，统一驱动所有计时器和倒计时
+
+    计时器不再各自占用一个线程轮询，而是把下一次需要处理的时间点放入队列，
+    工作线程只在最早的截止时间到达时醒来。截止时间使用单调时钟（纳秒整数），
+    不受系统时间调整影响。队列默认是最小堆（backend='heap'），
+    计时器数量极大时可以改用分层时间轮（backend='wheel'）。
+
+    传入 VirtualClock 时不启动工作线程，由调用方通过 advance() 推进时间并
+    同步处理到期事件。
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    # 条件变量的超时按 CLOCK_MONOTONIC 计算，挂起期间不走；每次最多等待这么久，
+    # 唤醒后最迟 MAX_WAIT_NS 就能处理挂起期间已经到期的计时器
+    MAX_WAIT_NS = NS_PER_SECOND
+
+    BACKENDS = {
+        'heap': TimerHeap,
+        'wheel': TimingWheel,
+    }
+
+    def __init__(self, backend='heap', clock=None):
+        self.clock = clock or SYSTEM_CLOCK
+        self._queue = self.BACKENDS[backend](start_ns=self.clock.monotonic_ns())
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._wake_at = None  # 工作线程当前等待到的截止时间，None 表示无限等待
+
+    @classmethod
+    def instance(cls):
+        """获取进程内共享的调度器实例"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def schedule(self, timer, deadline):
+        """安排计时器在 deadline（monotonic_ns）时刻被处理（会作废该计时器之前的安排）"""
+        with self._cond:
+            timer._token += 1
+            self._queue.push(deadline, timer, timer._token)
+            if self.clock.virtual:
+                return
+            self._ensure_worker()
+            # 只有新的截止时间早于工作线程正在等待的时间时才需要唤醒
+            if self._wake_at is None or deadline < self._wake_at:
+                self._cond.notify()
+
+    def cancel(self, timer):
+        """取消计时器的所有安排"""
+        with self._cond:
+            timer._token += 1
+            self._queue.discard(timer)
+
+    def pending_count(self):
+        """队列中条目数量（堆后端包含尚未清理的已取消条目）"""
+        with self._cond:
+            return len(self._queue)
+
+    def shutdown(self, timeout=None):
+        """停止工作线程"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+            thread = self._thread
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def advance(self, seconds):
+        """在虚拟时钟上推进时间，并按截止时间顺序同步处理期间到期的所有事件
+
+        返回处理的事件数。只能用于 VirtualClock。
+        """
+        if not self.clock.virtual:
+            raise RuntimeError("advance() 只能用于虚拟时钟")
+        target = self.clock.monotonic_ns() + int(round(seconds * NS_PER_SECOND))
+        fired = 0
+        while True:
+            with self._cond:
+                deadline = self._queue.next_deadline()
+                if deadline is None or deadline > target:
+                    break
+                self.clock.set_ns(deadline)
+                due = self._queue.pop_due(self.clock.monotonic_ns())
+            fired += len(due)
+            self._dispatch(due)
+        self.clock.set_ns(target)
+        return fired
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name='TimerScheduler', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running:
+                    deadline = self._queue.next_deadline()
+                    if deadline is None:
+                        self._wake_at = None
+                        self._cond.wait()
+                        continue
+                    timeout_ns = deadline - self.clock.monotonic_ns()
+                    if timeout_ns <= 0:
+                        break
+                    self._wake_at = deadline
+                    self._cond.wait(min(timeout_ns, self.MAX_WAIT_NS) / NS_PER_SECOND)
+                self._wake_at = None
+                if not self._running:
+                    return
+                due = self._queue.pop_due(self.clock.monotonic_ns())
+            self._dispatch(due)
+
+    def _dispatch(self, due):
+        # 回调在锁外执行，回调中可以安全地重新安排或取消计时器
+        for timer, token in due:
+            try:
+                next_deadline = timer._fire()
+            except Exception as e:
+                print(f"计时器回调出错: {e}")
+                next_deadline = None
+            if next_deadline is not None:
+                with self._cond:
+                    # 回调期间被取消或重新安排过的计时器不再自动续期
+                    if token == timer._token:
+                        timer._token += 1
+                        self._queue.push(next_deadline, timer, timer._token)
+
+
+class ScheduledTimer:
+    """由 TimerScheduler 驱动的单个计时器/倒计时（不依赖Qt）
+
+    已用/剩余时间全部基于调度器时钟的单调整数纳秒计算，系统时间被
+    NTP、手动修改等调整时不会跳变；clock（可为NTP校正时间）只用于把
+    截止时间换算成墙上时间用于显示（wall_deadline）。
+    提供 freq（返回本地时钟频率误差的函数，如 NTPClock.freq）时，本地时钟
+    走过的时间按 (1 + freq) 换算成真实时间，长时间倒计时不会随晶振漂移。
+    """
+
+    TICK_INTERVAL_NS = 100_000_000  # 轮询模式的刷新间隔（100毫秒）
+    TICK_EPSILON_NS = 1_000_000  # 跳变点之后的余量（1毫秒），避免提前醒来
+
+    def __init__(self, duration_seconds, is_countdown=False, clock=None,
+                 on_update=None, on_alarm=None, scheduler=None, tick_mode='second', freq=None):
+        self.duration = duration_seconds
+        self.duration_ns = int(round(duration_seconds * NS_PER_SECOND))
+        self.is_countdown = is_countdown
+        self.on_update = on_update
+        self.on_alarm = on_alarm
+        self.scheduler = scheduler or TimerScheduler.instance()
+        # 单调时间取自调度器的时钟，测试时可整体替换为 VirtualClock
+        self._monotonic_ns = self.scheduler.clock.monotonic_ns
+        self.clock = clock or self.scheduler.clock.time
+        self.freq = freq
+        # 'second': 只在显示内容变化的时刻醒来；'poll': 每 TICK_INTERVAL_NS 刷新一次
+        self.tick_mode = tick_mode
+        self.is_running = False
+        self.is_paused = False
+        self.is_finished = False
+        self.elapsed_ns = 0
+        self.start_ns = None
+        self._token = 0
+        self._last_update = None  # 上一次发出的 (时间字符串, 进度)
+        # 保护运行/暂停状态；可重入，回调中可以直接暂停或停止本计时器
+        self.pause_lock = threading.RLock()
+
+    @property
+    def elapsed(self):
+        """已用时间（秒）"""
+        return self.elapsed_ns / NS_PER_SECOND
+
+    @property
+    def remaining(self):
+        """剩余时间（秒），计时器模式下为0"""
+        if not self.is_countdown:
+            return 0
+        return max(0, self.duration_ns - self.elapsed_ns) / NS_PER_SECOND
+
+    def wall_deadline(self):
+        """倒计时结束时刻对应的墙上时间（按 clock 换算，用于显示）"""
+        if not self.is_countdown:
+            return None
+        return self.clock() + self.remaining
+
+    def start(self):
+        with self.pause_lock:
+            self.elapsed_ns = 0
+            self.start_ns = self._monotonic_ns()
+            self.is_running = True
+            self.is_paused = False
+            self.is_finished = False
+            self._last_update = None
+            self.scheduler.schedule(self, self.start_ns)
+
+    def pause(self):
+        """暂停：冻结已用时间并从调度器移除，暂停期间不产生任何唤醒"""
+        with self.pause_lock:
+            if not self.is_running or self.is_paused:
+                return
+            self.elapsed_ns = self._to_elapsed(self._monotonic_ns() - self.start_ns)
+            self.is_paused = True
+            self.scheduler.cancel(self)
+
+    def resume(self):
+        """继续：根据冻结的已用时间重新计算开始时间，并立即重新安排"""
+        with self.pause_lock:
+            if not self.is_running or not self.is_paused:
+                return
+            now_ns = self._monotonic_ns()
+            self.start_ns = now_ns - self._to_local(self.elapsed_ns)
+            self.is_paused = False
+            self.scheduler.schedule(self, now_ns)
+
+    def stop(self):
+        with self.pause_lock:
+            self.is_running = False
+            self.scheduler.cancel(self)
+
+    def _fire(self):
+        """处理一次到期，返回下一次截止时间（monotonic_ns，None 表示结束）"""
+        with self.pause_lock:
+            if not self.is_running or self.is_paused:
+                return None
+            return self._tick()
+
+    def _tick(self):
+        """计算当前显示内容并发出更新，返回下一次截止时间"""
+        now_ns = self._monotonic_ns()
+        self.elapsed_ns = self._to_elapsed(now_ns - self.start_ns)
+        if self.is_countdown:
+            remaining_ns = self.duration_ns - self.elapsed_ns
+            if remaining_ns <= 0:
+                self.elapsed_ns = self.duration_ns
+                self.is_running = False
+                self.is_finished = True
+                self._emit_update("00:00:00", 100)
+                if self.on_alarm:
+                    self.on_alarm()
+                return None
+
+            time_str = format_hms(remaining_ns // NS_PER_SECOND)
+
+            # 计算进度
+            progress = min(self.elapsed_ns * 100 // self.duration_ns, 100)
+        else:
+            elapsed_s = self.elapsed_ns // NS_PER_SECOND
+            time_str = format_hms(elapsed_s)
+
+            # 计时器模式：计算已用时间的百分比
+            if self.duration_ns > 0:
+                progress = min(self.elapsed_ns * 100 // self.duration_ns, 100)
+            else:
+                # 无限制计时器，每60秒一个周期
+                progress = elapsed_s % 60 * 100 // 60
+
+        self._emit_update(time_str, progress)
+        if self.tick_mode == 'poll':
+            return now_ns + self.TICK_INTERVAL_NS
+        return now_ns + self._to_local(self._delay_to_next_change_ns(progress)) + self.TICK_EPSILON_NS
+
+    def _to_elapsed(self, local_ns):
+        """本地单调时钟走过的纳秒数换算成真实经过的纳秒数"""
+        if self.freq is None:
+            return local_ns
+        return local_ns + int(local_ns * self.freq())
+
+    def _to_local(self, elapsed_ns):
+        """真实经过的纳秒数换算成本地单调时钟的纳秒数（_to_elapsed 的逆运算）"""
+        if self.freq is None:
+            return elapsed_ns
+        return int(elapsed_ns / (1 + self.freq()))
+
+    def _delay_to_next_change_ns(self, progress):
+        """距离下一次可见变化（秒数跳变或进度百分比跳变）的纳秒数"""
+        if self.is_countdown:
+            # 剩余时间向下取整显示，小数部分走完即跳到下一秒；到0时触发闹钟
+            delay = (self.duration_ns - self.elapsed_ns) % NS_PER_SECOND
+        else:
+            delay = NS_PER_SECOND - self.elapsed_ns % NS_PER_SECOND
+
+        # 短时长倒计时的进度百分比可能比秒数变化得更快
+        if self.duration_ns > 0 and progress < 100:
+            next_progress_ns = -(-(progress + 1) * self.duration_ns // 100)
+            progress_delay = next_progress_ns - self.elapsed_ns
+            if 0 < progress_delay < delay:
+                delay = progress_delay
+        return delay
+
+    def _emit_update(self, time_str, progress):
+        """只有显示内容真正变化时才通知界面"""
+        update = (time_str, progress)
+        if update == self._last_update:
+            return
+        self._last_update = update
+        if self.on_update:
+            self.on_update(time_str, progress)
+
+
+class ResolverCache:
+    """NTP服务器域名解析缓存
+
+    系统解析器不提供记录的TTL，因此缓存使用固定的有效期 ttl；超过有效期的
+    REFRESH_AHEAD 比例后，命中时仍返回缓存地址，同时在后台线程中刷新。
+    无法解析的域名按 negative_ttl 缓存失败结果，避免每次同步都等待解析超时。
+    """
+
+    DEFAULT_TTL = 300  # 解析结果的有效期（秒）
+    NEGATIVE_TTL = 60  # 解析失败结果的有效期（秒）
+    REFRESH_AHEAD = 0.8  # 有效期过去该比例后在后台提前刷新
+
+    def __init__(self, ttl=None, negative_ttl=None, clock=None):
+        self.ttl = self.DEFAULT_TTL if ttl is None else ttl
+        self.negative_ttl = self.NEGATIVE_TTL if negative_ttl is None else negative_ttl
+        self.clock = clock or SYSTEM_CLOCK
+        self._entries = {}  # (host, port) -> (过期时间, 刷新时间, (family, addr) 或 None, 错误)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def _now(self):
+        return self.clock.monotonic_ns() / NS_PER_SECOND
+
+    def lookup(self, host, port):
+        """只查缓存，不阻塞：命中返回 (family, addr)，未命中或已过期返回 None
+
+        命中失败缓存时抛出 socket.gaierror。
+        """
+        key = (host, port)
+        now = self._now()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now >= entry[0]:
+                return None
+            expires, refresh_at, address, error = entry
+            if address is not None and now >= refresh_at and key not in self._refreshing:
+                self._refreshing.add(key)
+                threading.Thread(target=self._refresh, args=key, daemon=True).start()
+        if address is None:
+            raise socket.gaierror(error)
+        return address
+
+    def resolve(self, host, port):
+        """返回 (family, addr)，未命中时同步解析；无法解析时抛出 socket.gaierror"""
+        address = self.lookup(host, port)
+        if address is None:
+            address = self._resolve_now(host, port)
+        return address
+
+    def prefetch(self, hosts, port=123):
+        """在后台解析尚未缓存的域名，之后的同步可以直接命中"""
+        for host in hosts:
+            try:
+                if self.lookup(host, port) is not None:
+                    continue
+            except socket.gaierror:
+                continue
+            threading.Thread(target=self._refresh, args=(host, port), daemon=True).start()
+
+    def invalidate(self, host=None):
+        """清除某个域名（默认全部）的缓存"""
+        with self._lock:
+            if host is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == host]:
+                    del self._entries[key]
+
+    def _resolve_now(self, host, port):
+        try:
+            family, _, _, _, addr = socket.getaddrinfo(host, port, 0, socket.SOCK_DGRAM)[0]
+        except socket.gaierror as e:
+            now = self._now()
+            with self._lock:
+                self._entries[(host, port)] = (now + self.negative_ttl, None, None, str(e))
+            raise
+        now = self._now()
+        with self._lock:
+            self._entries[(host, port)] = (now + self.ttl, now + self.ttl * self.REFRESH_AHEAD,
+                                           (family, addr), None)
+        return family, addr
+
+    def _refresh(self, host, port):
+        try:
+            self._resolve_now(host, port)
+        except socket.gaierror:
+            pass
+        except OSError as e:
+            # 临时的网络错误不覆盖仍然有效的旧地址
+            print(f"刷新NTP服务器地址失败 {host}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard((host, port))
+
+
+# Linux 上让内核记录数据包到达时间（socket 模块没有导出这两个常量时使用常见架构上的值）
+if sys.platform.startswith('linux'):
+    SO_TIMESTAMPNS = getattr(socket, 'SO_TIMESTAMPNS', 35)
+    SO_TIMESTAMP = getattr(socket, 'SO_TIMESTAMP', 29)
+else:
+    SO_TIMESTAMPNS = SO_TIMESTAMP = None
+_TIMESPEC = struct.Struct('@ll')  # struct timespec / struct timeval：秒 + 纳秒/微秒
+
+
+class NTPSocketPool:
+    """NTP客户端共享的UDP套接字（每个地址族一个，长期复用）
+
+    请求的传输时间戳（T1）同时作为标签：服务器会把它原样放进应答的起始时间戳，
+    收到应答时据此找到发出请求的查询，把应答放进它的收件箱并唤醒它。
+    任何一个正在等待的查询都可以调用 receive() 读取套接字，并发的查询互不干扰；
+    没有对应请求的应答（迟到或伪造）直接丢弃。
+
+    Linux 上套接字开启 SO_TIMESTAMPNS（不支持时退回 SO_TIMESTAMP），用 recvmsg
+    取得内核记录的数据包到达时间作为 T4，不受界面线程繁忙和 Python 调度延迟的影响。
+    """
+
+    RECV_SIZE = 1024
+
+    def __init__(self):
+        self._sockets = {}  # 地址族 -> 套接字
+        self._timestamp_units = {}  # 套接字 -> 内核时间戳的单位（纳秒/微秒每秒），不支持时为 None
+        self._pending = {}  # 请求时间戳 -> (收件箱, 唤醒函数)
+        self._lock = threading.Lock()
+
+    def sockets(self):
+        with self._lock:
+            return list(self._sockets.values())
+
+    def send(self, family, addr, t1, inbox, waker):
+        """发送一个以 t1 为传输时间戳的请求，返回作为标签的8字节时间戳
+
+        应答到达时 (时间戳, 应答, T4) 会被追加到 inbox，并调用 waker()。
+        """
+        packet = NTPTimeSync._build_request(t1)
+        stamp = packet[40:48]
+        with self._lock:
+            # 同一时刻的请求改动最低位保证标签唯一（相差不到1纳秒）
+            while stamp in self._pending:
+                stamp = stamp[:7] + bytes([(stamp[7] + 1) & 0xFF])
+            sock = self._sockets.get(family)
+            if sock is None:
+                sock = socket.socket(family, socket.SOCK_DGRAM)
+                sock.setblocking(False)
+                self._timestamp_units[sock] = self._enable_timestamps(sock)
+                self._sockets[family] = sock
+            self._pending[stamp] = (inbox, waker)
+            try:
+                sock.sendto(packet[:40] + stamp, addr)
+            except OSError:
+                del self._pending[stamp]
+                raise
+        return stamp
+
+    @staticmethod
+    def _enable_timestamps(sock):
+        """尝试开启内核接收时间戳，返回时间戳小数部分的单位"""
+        for option, units in ((SO_TIMESTAMPNS, NS_PER_SECOND), (SO_TIMESTAMP, 1_000_000)):
+            if option is None:
+                continue
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, option, 1)
+                return units
+            except OSError:
+                continue
+        return None
+
+    def _recv(self, sock):
+        """读取一个数据包，返回 (数据, T4)；有内核时间戳时用它作为 T4"""
+        units = self._timestamp_units.get(sock)
+        if units is None:
+            data = sock.recv(self.RECV_SIZE)
+            return data, systime.time_ns() / NS_PER_SECOND
+        data, ancdata, _, _ = sock.recvmsg(self.RECV_SIZE, socket.CMSG_SPACE(_TIMESPEC.size))
+        for level, kind, cmsg in ancdata:
+            if level == socket.SOL_SOCKET and kind in (SO_TIMESTAMPNS, SO_TIMESTAMP) \
+                    and len(cmsg) >= _TIMESPEC.size:
+                seconds, fraction = _TIMESPEC.unpack(cmsg[:_TIMESPEC.size])
+                return data, seconds + fraction / units
+        return data, systime.time_ns() / NS_PER_SECOND
+
+    def forget(self, stamps):
+        """放弃等待这些请求的应答"""
+        with self._lock:
+            for stamp in stamps:
+                self._pending.pop(stamp, None)
+
+    def receive(self):
+        """读取所有套接字上已到达的应答，分发给对应的查询"""
+        for sock in self.sockets():
+            while True:
+                try:
+                    data, t4 = self._recv(sock)
+                except (BlockingIOError, InterruptedError):
+                    break
+                except OSError:
+                    # ICMP 错误等只影响单个请求，等它自然超时
+                    break
+                with self._lock:
+                    entry = self._pending.pop(data[24:32], None)
+                if entry is not None:
+                    inbox, waker = entry
+                    inbox.append((data[24:32], data, t4))
+                    waker()
+
+    def close(self):
+        """关闭所有套接字，下次发送时重新创建"""
+        with self._lock:
+            for sock in self._sockets.values():
+                sock.close()
+            self._sockets.clear()
+            self._timestamp_units.clear()
+            self._pending.clear()
+
+
+class NTPTimeSync:
+    """NTP时间同步工具类"""
+    
+    NTP_PORT = 123
+    TIMEOUT = 5  # 连接超时时间（秒），并发查询时为总超时
+    BURST_SAMPLES = 4  # 同步时每个服务器连续采样的次数
+    BURST_INTERVAL = 0.25  # 连续采样的间隔（秒）
+    MIN_DISPERSION = 0.01  # 每个样本至少计入的误差（秒），避免区间过窄
+    MIN_CLUSTER = 3  # 聚类时至少保留的服务器数量
+    REPLY_GRACE = 0.2  # 第一轮采样收到足够应答后，再等待稍慢服务器的时间（秒）
+    PROBE_ROUNDS = 5  # 服务器测试的轮数
+    PROBE_INTERVAL = 1.0  # 服务器测试每轮的间隔（秒）
+    PROBE_TIMEOUT = 2.0  # 服务器测试每轮的超时（秒）
+    resolver = ResolverCache()  # 服务器域名解析缓存，所有查询共享
+    socket_pool = NTPSocketPool()  # 所有查询共享的UDP套接字
+    NTP_EPOCH_OFFSET = 2208988800  # 1900年到1970年的秒数
+    REQUEST_PACKET = b'\x1b' + 47 * b'\0'  # LI=0, VN=3, Mode=3（客户端）
+    MAX_DELAY = 1.0  # 往返延迟超过该值（秒）的样本视为不可靠而丢弃
+    
+    @staticmethod
+    def ntp_request(server='time.windows.com', port=123):
+        """向NTP服务器请求时间，返回服务器的传输时间（经由共享的UDP套接字发送）"""
+        result = NTPTimeSync.query_servers([server], NTPTimeSync.TIMEOUT, port=port)[0]
+        if result['error']:
+            print(result['error'])
+        return result['ntp_time']
+    
+    @staticmethod
+    def query_servers(server_list=None, timeout=None, min_samples=None, port=None, on_result=None,
+                      grace=None):
+        """并发向多个NTP服务器请求时间
+
+        地址已在 resolver 缓存中的服务器直接发送请求，其余服务器在各自的线程里
+        解析地址后立即发送。所有请求都经由共享的 socket_pool 发出，主线程用 select
+        同时等待所有应答，总耗时不超过 timeout。收到 min_samples 个有效应答后立即返回
+        （提供 grace 时再最多等待 grace 秒，让稍慢的服务器也有机会应答），
+        此时还没有应答的服务器 skipped 为 True（不是超时，不应视为不可达）；
+        min_samples 为 None 时等待全部服务器应答或超时。
+        返回与 server_list 顺序一致的结果列表，每项包含 server、ntp_time
+        （服务器发送时间T3）、latency（T4-T1）、local_time（收到应答的本地时间T4）、
+        offset、delay、stratum 和 error；offset/delay 按 T1-T4 四个时间戳计算。
+        提供 on_result 时，每个服务器有了结果（应答、出错或超时）就在查询线程中
+        立即调用 on_result(结果)，不必等全部服务器结束。
+        """
+        if server_list is None:
+            server_list = NTP_SERVERS
+        if timeout is None:
+            timeout = NTPTimeSync.TIMEOUT
+        if port is None:
+            port = NTPTimeSync.NTP_PORT
+
+        results = {server: {'server': server, 'ntp_time': None, 'latency': None,
+                            'local_time': None, 'offset': None, 'delay': None,
+                            'stratum': None, 'error': None, 'skipped': False}
+                   for server in server_list}
+        pool = NTPTimeSync.socket_pool
+        pending = {}  # 请求中的传输时间戳 -> (服务器, T1)
+        inbox = collections.deque()  # 套接字池分发给本次查询的 (时间戳, 应答, T4)
+        lock = threading.Lock()
+        state = {'resolving': len(results), 'closed': False}
+        # 解析线程发出请求、或其他查询替本次查询收到应答后写入一个字节，立即唤醒 select
+        wake_recv, wake_send = socket.socketpair()
+        wake_recv.setblocking(False)
+
+        def wake():
+            try:
+                wake_send.send(b'\0')
+            except OSError:
+                pass
+
+        def send_request(server, family, addr):
+            try:
+                with lock:
+                    if state['closed']:
+                        return
+                    # 地址已解析完毕，T1 只包含真正的网络往返
+                    t1 = systime.time_ns() / NS_PER_SECOND
+                    stamp = pool.send(family, addr, t1, inbox, wake)
+                    pending[stamp] = (server, t1)
+            except OSError as e:
+                results[server]['error'] = f"NTP请求失败 {server}: {e}"
+            finally:
+                with lock:
+                    state['resolving'] -= 1
+                    if not state['closed']:
+                        wake()
+
+        def resolve_and_send(server):
+            try:
+                family, addr = NTPTimeSync.resolver.resolve(server, port)
+            except socket.gaierror:
+                results[server]['error'] = f"无法解析NTP服务器地址: {server}"
+                family = addr = None
+            except OSError as e:
+                results[server]['error'] = f"NTP请求失败 {server}: {e}"
+                family = addr = None
+            if addr is None:
+                with lock:
+                    state['resolving'] -= 1
+                    if not state['closed']:
+                        wake()
+                return
+            send_request(server, family, addr)
+
+        for server in results:
+            # 缓存命中时直接发送，只有需要解析的服务器才启动线程
+            try:
+                cached = NTPTimeSync.resolver.lookup(server, port)
+            except socket.gaierror:
+                results[server]['error'] = f"无法解析NTP服务器地址: {server}"
+                with lock:
+                    state['resolving'] -= 1
+                continue
+            if cached is not None:
+                send_request(server, *cached)
+            else:
+                threading.Thread(target=resolve_and_send, args=(server,), daemon=True).start()
+
+        reported = set()
+
+        def report_finished(everything=False):
+            if on_result is None:
+                return
+            for server, result in results.items():
+                if server not in reported and (everything or result['error'] or result['offset'] is not None):
+                    reported.add(server)
+                    on_result(result)
+
+        deadline = systime.monotonic() + timeout
+        answered = 0
+        in_grace = False
+        try:
+            while True:
+                while inbox:
+                    stamp, data, t4 = inbox.popleft()
+                    with lock:
+                        server, t1 = pending.pop(stamp)
+                    try:
+                        sample = NTPTimeSync._parse_response(data, stamp, t1, t4)
+                    except ValueError as e:
+                        results[server]['error'] = f"NTP请求失败 {server}: {e}"
+                        continue
+                    results[server].update(sample)
+                    answered += 1
+                report_finished()
+
+                with lock:
+                    waiting = len(pending)
+                    resolving = state['resolving']
+                if min_samples is not None and answered >= min_samples:
+                    if not grace:
+                        break
+                    if not in_grace:
+                        in_grace = True
+                        deadline = min(deadline, systime.monotonic() + grace)
+                if not waiting and not resolving:
+                    break
+                remaining = deadline - systime.monotonic()
+                if remaining <= 0:
+                    break
+                readable, _, _ = select.select(pool.sockets() + [wake_recv], [], [], remaining)
+                if wake_recv in readable:
+                    try:
+                        wake_recv.recv(1024)
+                    except OSError:
+                        pass
+                if len(readable) > (wake_recv in readable):
+                    pool.receive()
+        finally:
+            with lock:
+                state['closed'] = True
+                pool.forget(pending)
+                cut_off = min_samples is not None and answered >= min_samples
+                for server, result in results.items():
+                    if result['offset'] is None and result['error'] is None:
+                        if cut_off:
+                            # 只是没有再等它，不代表服务器不可达
+                            result['skipped'] = True
+                        else:
+                            result['error'] = f"连接NTP服务器 {server} 超时"
+                pending.clear()
+                wake_recv.close()
+                wake_send.close()
+        report_finished(everything=True)
+
+        return [results[server] for server in server_list]
+
+    @staticmethod
+    def _to_ntp_timestamp(unix_time):
+        """Unix时间转换为8字节NTP时间戳（自1900年以来的秒数，32位整数+32位小数）"""
+        ntp_time = unix_time + NTPTimeSync.NTP_EPOCH_OFFSET
+        int_part = int(ntp_time)
+        frac_part = int((ntp_time - int_part) * 2**32) & 0xFFFFFFFF
+        return struct.pack('!II', int_part & 0xFFFFFFFF, frac_part)
+
+    @staticmethod
+    def _from_ntp_timestamp(data):
+        """8字节NTP时间戳转换为Unix时间"""
+        int_part, frac_part = struct.unpack('!II', data)
+        return int_part + frac_part / 2**32 - NTPTimeSync.NTP_EPOCH_OFFSET
+
+    @staticmethod
+    def _build_request(t1):
+        """构建客户端请求，传输时间戳填入 T1，服务器会原样放回应答的起始时间戳"""
+        return NTPTimeSync.REQUEST_PACKET[:40] + NTPTimeSync._to_ntp_timestamp(t1)
+
+    @staticmethod
+    def _parse_response(data, request_stamp, t1, t4):
+        """按 T1-T4 四个时间戳解析应答，返回样本字典；无效应答抛出 ValueError
+
+        T1 客户端发送时间，T2 服务器接收时间，T3 服务器发送时间，T4 客户端接收时间：
+            offset = ((T2 - T1) + (T3 - T4)) / 2
+            delay  = (T4 - T1) - (T3 - T2)
+        """
+        if len(data) < 48:
+            raise ValueError("应答长度不足")
+        leap = data[0] >> 6
+        mode = data[0] & 0x7
+        stratum = data[1]
+        if mode != 4:
+            raise ValueError(f"应答模式错误: {mode}")
+        if data[24:32] != request_stamp:
+            # 起始时间戳不是本次请求的 T1，可能是迟到的旧应答或伪造包
+            raise ValueError("起始时间戳不匹配")
+        if stratum == 0:
+            raise ValueError(f"服务器拒绝服务: {data[12:16].decode('ascii', 'replace')}")
+        if leap == 3:
+            raise ValueError("服务器时钟未同步")
+
+        t2 = NTPTimeSync._from_ntp_timestamp(data[32:40])
+        t3 = NTPTimeSync._from_ntp_timestamp(data[40:48])
+        delay = (t4 - t1) - (t3 - t2)
+        if delay < 0 or delay > NTPTimeSync.MAX_DELAY:
+            raise ValueError(f"往返延迟异常: {delay * 1000:.1f} ms")
+        return {
+            'ntp_time': t3,
+            'latency': t4 - t1,
+            'local_time': t4,
+            'offset': ((t2 - t1) + (t3 - t4)) / 2,
+            'delay': delay,
+            'stratum': stratum,
+        }
+
+    @staticmethod
+    def collect_samples(server_list=None, samples=None, timeout=None, interval=None, skipped=None):
+        """对每个服务器连续采样多次，返回 {服务器: [有效样本, ...]}
+
+        第一轮查询全部服务器，确定哪些服务器有应答；之后只对有应答的服务器
+        继续采样。每轮过半数服务器应答后只再等待 REPLY_GRACE 秒，不让无应答或
+        丢包的服务器拖到超时；每轮最多等待 MAX_DELAY（更慢的样本反正会被丢弃），
+        总耗时不超过 timeout。提供集合 skipped 时，第一轮因此没有等到应答的服务器
+        会加入其中，调用方可以据此区分"没有等"和"不可达"。
+        """
+        if server_list is None:
+            server_list = NTP_SERVERS
+        if samples is None:
+            samples = NTPTimeSync.BURST_SAMPLES
+        if timeout is None:
+            timeout = NTPTimeSync.TIMEOUT
+        if interval is None:
+            interval = NTPTimeSync.BURST_INTERVAL
+        deadline = systime.monotonic() + timeout
+
+        def sample_round(servers, round_timeout):
+            return NTPTimeSync.query_servers(servers, round_timeout, min_samples=len(servers) // 2 + 1,
+                                             grace=NTPTimeSync.REPLY_GRACE)
+
+        by_server = {}
+        for result in sample_round(server_list, timeout / 2):
+            if result['offset'] is not None:
+                by_server[result['server']] = [result]
+            elif result['skipped'] and skipped is not None:
+                skipped.add(result['server'])
+
+        for _ in range(samples - 1):
+            remaining = deadline - systime.monotonic() - interval
+            if not by_server or remaining <= 0:
+                break
+            systime.sleep(interval)
+            round_timeout = min(remaining, NTPTimeSync.MAX_DELAY)
+            for result in sample_round(list(by_server), round_timeout):
+                if result['offset'] is not None:
+                    by_server[result['server']].append(result)
+        return by_server
+
+    @staticmethod
+    def _clock_filter(samples):
+        """时钟过滤：取往返延迟最小的样本（排队延迟最少，偏移量最可信）
+
+        jitter 为其余样本偏移量相对该样本的均方根差。
+        """
+        best = min(samples, key=lambda sample: sample['delay'])
+        others = [sample['offset'] - best['offset'] for sample in samples if sample is not best]
+        jitter = (sum(d * d for d in others) / len(others)) ** 0.5 if others else 0.0
+        return {
+            'server': best['server'],
+            'offset': best['offset'],
+            'delay': best['delay'],
+            'latency': best['latency'],
+            'stratum': best['stratum'],
+            'jitter': jitter,
+            'samples': len(samples),
+            # 真实偏移量以较高把握落在 offset ± distance 之内
+            'distance': best['delay'] / 2 + jitter + NTPTimeSync.MIN_DISPERSION,
+        }
+
+    @staticmethod
+    def _select_truechimers(candidates):
+        """区间交集（Marzullo）算法：找出被多数服务器区间共同覆盖的范围
+
+        每个候选对应区间 [offset - distance, offset + distance]。从假设没有
+        错误服务器开始，逐步放宽，直到至少 n - f 个区间有公共交集（f 必须少于半数）。
+        与交集不重叠的服务器视为错误时钟（falseticker）被剔除。
+        """
+        n = len(candidates)
+        edges = []
+        for candidate in candidates:
+            edges.append((candidate['offset'] - candidate['distance'], -1))
+            edges.append((candidate['offset'] + candidate['distance'], 1))
+        ascending = sorted(edges)
+        descending = sorted(edges, key=lambda edge: (-edge[0], -edge[1]))
+
+        for falsetickers in range((n + 1) // 2):
+            needed = n - falsetickers
+            low = high = None
+            count = 0
+            for value, kind in ascending:
+                count -= kind
+                if count >= needed:
+                    low = value
+                    break
+            count = 0
+            for value, kind in descending:
+                count += kind
+                if count >= needed:
+                    high = value
+                    break
+            if low is not None and high is not None and low <= high:
+                return [c for c in candidates
+                        if c['offset'] - c['distance'] <= high
+                        and c['offset'] + c['distance'] >= low]
+        return []
+
+    @staticmethod
+    def _cluster(survivors):
+        """聚类：反复剔除与其他服务器偏差最大的一个，直到它不比最稳定服务器的抖动更差"""
+        survivors = sorted(survivors, key=lambda c: c['distance'])
+        while len(survivors) > NTPTimeSync.MIN_CLUSTER:
+            def selection_jitter(candidate):
+                diffs = [(c['offset'] - candidate['offset']) ** 2 for c in survivors if c is not candidate]
+                return (sum(diffs) / len(diffs)) ** 0.5
+
+            worst = max(survivors, key=selection_jitter)
+            if selection_jitter(worst) <= min(c['jitter'] for c in survivors):
+                break
+            survivors.remove(worst)
+        return survivors
+
+    @staticmethod
+    def get_ntp_time(server_list=None, timeout=None, samples=None):
+        """多次采样并综合多个服务器，得到稳定的时间偏移量
+
+        每个服务器的样本先经时钟过滤，再用区间交集算法剔除错误时钟、
+        聚类去掉离群服务器，最后按误差距离的倒数加权平均幸存者的偏移量。
+        """
+        by_server = NTPTimeSync.collect_samples(server_list, samples, timeout)
+        candidates = [NTPTimeSync._clock_filter(samples) for samples in by_server.values()]
+        return NTPTimeSync.combine(candidates)
+
+    @staticmethod
+    def combine(candidates):
+        """从各服务器的过滤结果中选出可信服务器并合成偏移量，没有可信服务器时返回 None"""
+        truechimers = NTPTimeSync._select_truechimers(candidates)
+        if not truechimers:
+            if candidates:
+                print("NTP服务器之间的时间无法达成一致，放弃本次同步")
+            return None
+        survivors = NTPTimeSync._cluster(truechimers)
+
+        weights = [1 / c['distance'] for c in survivors]
+        offset = sum(w * c['offset'] for w, c in zip(weights, survivors)) / sum(weights)
+        jitter = (sum((c['offset'] - offset) ** 2 for c in survivors) / len(survivors)) ** 0.5
+        best = survivors[0]  # 误差距离最小的服务器
+        local_time = systime.time()
+        return {
+            'timestamp': local_time + offset,
+            'server': best['server'],
+            'latency': best['latency'],
+            'delay': best['delay'],
+            'local_time': local_time,
+            'offset': offset,
+            'jitter': jitter,
+            'servers': [c['server'] for c in survivors],
+            'falsetickers': [c['server'] for c in candidates if c not in truechimers],
+        }
+    
+    @staticmethod
+    def get_formatted_ntp_time(server_list=None):
+        """获取格式化的NTP时间"""
+        return NTPTimeSync.format_result(NTPTimeSync.get_ntp_time(server_list))
+
+    @staticmethod
+    def format_result(result):
+        """把 get_ntp_time/combine 的结果转换为界面显示用的格式"""
+        if result:
+            # 转换为datetime对象
+            ntp_datetime = datetime.fromtimestamp(result['timestamp'])
+            local_datetime = datetime.fromtimestamp(result['local_time'])
+            
+            return {
+                'ntp_time': ntp_datetime,
+                'local_time': local_datetime,
+                'server': result['server'],
+                'latency': result['latency'],
+                'offset': result['offset'],
+                'jitter': result['jitter'],
+                'servers': result['servers'],
+                'formatted_ntp': ntp_datetime.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
+                'formatted_local': local_datetime.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+            }
+        else:
+            return None
+    
+    @staticmethod
+    def test_all_servers(server_list=None, timeout=None):
+        """并发测试所有NTP服务器的响应"""
+        results = []
+        for result in NTPTimeSync.query_servers(server_list, timeout):
+            available = result['ntp_time'] is not None
+            results.append({
+                'server': result['server'],
+                'latency': result['latency'] if available else None,
+                'offset': result['offset'] if available else None,
+                'status': NTPTimeSync._probe_status(result)
+            })
+        return results
+
+    @staticmethod
+    def _probe_status(result):
+        """query_servers 单个结果对应的状态文字"""
+        if result['ntp_time'] is not None:
+            return '可用'
+        if result['error'] is None or '超时' in result['error']:
+            return '不可用'
+        return f"错误: {result['error']}"
+
+    @staticmethod
+    def probe_servers(server_list=None, rounds=None, interval=None, timeout=None,
+                      on_result=None, stop_event=None):
+        """多轮并发测试服务器，返回 NTPProbeStats
+
+        每个服务器的结果一到达，就用该服务器最新的统计（NTPProbeStats.summary）
+        调用 on_result，界面可以边测边显示。stop_event 被设置后不再开始新的一轮。
+        """
+        if server_list is None:
+            server_list = NTP_SERVERS
+        if rounds is None:
+            rounds = NTPTimeSync.PROBE_ROUNDS
+        if interval is None:
+            interval = NTPTimeSync.PROBE_INTERVAL
+        if timeout is None:
+            timeout = NTPTimeSync.PROBE_TIMEOUT
+        stop_event = stop_event or threading.Event()
+        stats = NTPProbeStats(server_list)
+
+        def report(result):
+            stats.add(result)
+            if on_result:
+                on_result(stats.summary(result['server']))
+
+        for round_index in range(rounds):
+            if stop_event.is_set():
+                break
+            NTPTimeSync.query_servers(server_list, timeout, on_result=report)
+            if round_index < rounds - 1 and stop_event.wait(interval):
+                break
+        return stats
+
+
+def percentile(values, fraction, default=None):
+    """百分位数（线性插值），fraction 为 0~1；空列表返回 default"""
+    if not values:
+        return default
+    values = sorted(values)
+    position = fraction * (len(values) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+class NTPProbeStats:
+    """多轮服务器测试的统计：每个服务器的应答率、延迟和偏移量百分位数"""
+
+    def __init__(self, server_list):
+        self._servers = {server: {'sent': 0, 'received': 0, 'latencies': [], 'offsets': [],
+                                  'status': '测试中'}
+                         for server in server_list}
+        self._lock = threading.Lock()
+
+    def add(self, result):
+        """加入 query_servers 的一个结果"""
+        with self._lock:
+            entry = self._servers[result['server']]
+            entry['sent'] += 1
+            entry['status'] = NTPTimeSync._probe_status(result)
+            if result['ntp_time'] is not None:
+                entry['received'] += 1
+                entry['latencies'].append(result['latency'])
+                entry['offsets'].append(result['offset'])
+
+    def summary(self, server):
+        """单个服务器的统计，时间单位为秒，没有应答时延迟/偏移为 None"""
+        with self._lock:
+            entry = self._servers[server]
+            latencies, offsets = entry['latencies'], entry['offsets']
+            return {
+                'server': server,
+                'status': entry['status'],
+                'sent': entry['sent'],
+                'received': entry['received'],
+                'latency_p50': percentile(latencies, 0.5),
+                'latency_p95': percentile(latencies, 0.95),
+                'offset_p05': percentile(offsets, 0.05),
+                'offset_p50': percentile(offsets, 0.5),
+                'offset_p95': percentile(offsets, 0.95),
+            }
+
+    def summaries(self):
+        """所有服务器的统计，顺序与测试时的服务器列表一致"""
+        return [self.summary(server) for server in self._servers]
+
+
+class NTPServerHealth:
+    """单个NTP服务器的健康状态
+
+    reach 是8位可达寄存器：每次轮询左移一位，收到有效应答时最低位置1，
+    全为0表示最近8次轮询都失败。candidate 是最近一次成功轮询的时钟过滤结果。
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.reach = 0
+        self.poll_exp = 0  # 轮询间隔 = 基准间隔 * 2 ** poll_exp
+        self.stable_count = 0  # 连续稳定的轮询次数
+        self.failures = 0  # 连续失败次数
+        self.next_poll = 0.0  # 下次轮询时间（monotonic 秒）
+        self.last_success = None  # 上次成功轮询的时间（monotonic 秒）
+        self.candidate = None
+
+    @property
+    def score(self):
+        """健康分数：最近8次轮询中成功的比例"""
+        return bin(self.reach).count('1') / 8
+
+    @property
+    def delay(self):
+        return self.candidate['delay'] if self.candidate else None
+
+    @property
+    def jitter(self):
+        return self.candidate['jitter'] if self.candidate else None
+
+
+class NTPPollScheduler:
+    """自适应NTP轮询：按服务器的健康状态决定各自的轮询时间
+
+    稳定的服务器（偏移量变化在抖动范围内）连续 POLL_LIMIT 次后轮询间隔加倍，
+    偏移量跳变时间隔减半，范围为基准间隔的 2**MIN_POLL_EXP 到 2**MAX_POLL_EXP 倍。
+    无应答的服务器按连续失败次数指数退避，最长为基准间隔的 2**MAX_BACKOFF_EXP 倍，
+    长期失效的服务器因此几乎不再占用同步时间。每次同步只查询到期的服务器，
+    再用所有仍然可达的服务器的最新结果合成偏移量；较早的结果先按本地时钟的
+    频率误差外推到现在，误差距离按 PHI 随结果的年龄增大，不会压过刚测得的结果。
+    """
+
+    MIN_POLL_EXP = -2
+    MAX_POLL_EXP = 3
+    MAX_BACKOFF_EXP = 5
+    POLL_LIMIT = 2  # 连续稳定多少次后加长轮询间隔
+    POLL_ADJUST = 4  # 偏移量变化超过 POLL_ADJUST 倍误差时视为不稳定
+    PHI = 15e-6  # 旧结果的误差距离每秒增加的量（本地时钟频率的容许误差，与 NTP 相同）
+
+    def __init__(self, servers=None, interval=3600, clock=None):
+        self.clock = clock or SYSTEM_CLOCK
+        self.interval = interval
+        self.servers = {server: NTPServerHealth(server)
+                        for server in (NTP_SERVERS if servers is None else servers)}
+        self._lock = threading.Lock()
+
+    def _now(self):
+        return self.clock.monotonic_ns() / NS_PER_SECOND
+
+    def set_interval(self, interval):
+        """修改基准轮询间隔（秒），已安排的轮询时间按新间隔重新计算"""
+        with self._lock:
+            ratio = interval / self.interval
+            now = self._now()
+            self.interval = interval
+            for health in self.servers.values():
+                if health.next_poll > now:
+                    health.next_poll = now + (health.next_poll - now) * ratio
+
+    def due_servers(self):
+        """返回已经到期需要轮询的服务器"""
+        now = self._now()
+        with self._lock:
+            return [server for server, health in self.servers.items() if health.next_poll <= now]
+
+    def seconds_until_next(self):
+        """距离最近一个服务器到期还有多少秒"""
+        with self._lock:
+            next_poll = min(health.next_poll for health in self.servers.values())
+        return max(0.0, next_poll - self._now())
+
+    def record(self, server, samples):
+        """记录一次轮询结果（该服务器的有效样本列表，失败时为空），并安排下次轮询"""
+        now = self._now()
+        with self._lock:
+            health = self.servers[server]
+            health.reach = ((health.reach << 1) & 0xFF) | (1 if samples else 0)
+            if not samples:
+                health.failures += 1
+                backoff = min(self.MIN_POLL_EXP + health.failures - 1, self.MAX_BACKOFF_EXP)
+                health.next_poll = now + self.interval * 2 ** backoff
+                return
+
+            candidate = NTPTimeSync._clock_filter(samples)
+            previous = health.candidate
+            if previous is not None and abs(candidate['offset'] - previous['offset']) > \
+                    self.POLL_ADJUST * (candidate['jitter'] + NTPTimeSync.MIN_DISPERSION):
+                health.stable_count = 0
+                health.poll_exp = max(self.MIN_POLL_EXP, health.poll_exp - 1)
+            else:
+                health.stable_count += 1
+                if health.stable_count >= self.POLL_LIMIT:
+                    health.stable_count = 0
+                    health.poll_exp = min(self.MAX_POLL_EXP, health.poll_exp + 1)
+            health.failures = 0
+            health.candidate = candidate
+            health.last_success = now
+            health.next_poll = now + self.interval * 2 ** health.poll_exp
+
+    def defer(self, server):
+        """本次轮询没有等到该服务器（其他服务器已足够），不计为失败
+
+        可达寄存器和退避状态保持不变，按最短轮询间隔稍后单独再查询一次；
+        届时通常不再与较快的服务器同一轮，不会因为应答慢而一直被跳过。
+        """
+        now = self._now()
+        with self._lock:
+            self.servers[server].next_poll = now + self.interval * 2 ** self.MIN_POLL_EXP
+
+    def candidates(self, freq=0.0):
+        """仍然可达、结果未过期（不超过两个轮询间隔）的服务器的最新过滤结果
+
+        freq 为本地时钟的频率误差（NTPClock.freq），每个结果的偏移量按测得后
+        经过的时间外推到现在，误差距离加上 PHI * 经过的时间。
+        """
+        now = self._now()
+        result = []
+        with self._lock:
+            for health in self.servers.values():
+                if not health.reach or health.candidate is None:
+                    continue
+                age = now - health.last_success
+                if age > 2 * self.interval * 2 ** health.poll_exp:
+                    continue
+                candidate = dict(health.candidate)
+                candidate['offset'] += freq * age
+                candidate['distance'] += self.PHI * age
+                result.append(candidate)
+        return result
+
+    def poll(self, force=False, timeout=None, samples=None, freq=0.0):
+        """查询到期的服务器（force 时查询全部服务器）并返回合成的同步结果
+
+        freq 为本地时钟的频率误差，用于把未到期服务器的旧结果外推到现在（见 candidates）。
+        返回值与 NTPTimeSync.get_ntp_time 相同，没有可用服务器时返回 None。
+        """
+        if force:
+            due = list(self.servers)
+        elif not self.candidates():
+            # 没有可用的结果（例如刚启动）时，除了仍在退避的失效服务器都查询一次
+            due = [server for server, health in self.servers.items()
+                   if health.failures == 0 or server in self.due_servers()]
+        else:
+            due = self.due_servers()
+        if due:
+            skipped = set()
+            by_server = NTPTimeSync.collect_samples(due, samples, timeout, skipped=skipped)
+            for server in due:
+                if server in skipped:
+                    self.defer(server)
+                else:
+                    self.record(server, by_server.get(server, []))
+        return NTPTimeSync.combine(self.candidates(freq))
+
+    def state(self):
+        """导出各服务器的健康状态（可以保存为JSON）：{服务器: [reach, poll_exp, 连续失败次数, 距下次轮询秒数]}"""
+        now = self._now()
+        with self._lock:
+            return {server: [health.reach, health.poll_exp, health.failures,
+                             round(max(0.0, health.next_poll - now), 1)]
+                    for server, health in self.servers.items()}
+
+    def restore_state(self, state, elapsed=0.0):
+        """恢复 state() 导出的健康状态，elapsed 为导出后经过的秒数"""
+        now = self._now()
+        with self._lock:
+            for server, values in (state or {}).items():
+                health = self.servers.get(server)
+                if health is None:
+                    continue
+                try:
+                    reach, poll_exp, failures, next_in = values
+                    health.reach = int(reach) & 0xFF
+                    health.poll_exp = min(self.MAX_POLL_EXP, max(self.MIN_POLL_EXP, int(poll_exp)))
+                    health.failures = max(0, int(failures))
+                    health.next_poll = now + max(0.0, float(next_in) - elapsed)
+                except (TypeError, ValueError) as e:
+                    print(f"恢复NTP服务器状态失败 {server}: {e}")
+
+
+class _Timex(ctypes.Structure):
+    """Linux struct timex（adjtimex 的参数），末尾保留字段按内核定义补齐"""
+    _fields_ = [
+        ('modes', ctypes.c_uint), ('offset', ctypes.c_long), ('freq', ctypes.c_long),
+        ('maxerror', ctypes.c_long), ('esterror', ctypes.c_long), ('status', ctypes.c_int),
+        ('constant', ctypes.c_long), ('precision', ctypes.c_long), ('tolerance', ctypes.c_long),
+        ('time_sec', ctypes.c_long), ('time_usec', ctypes.c_long), ('tick', ctypes.c_long),
+        ('ppsfreq', ctypes.c_long), ('jitter', ctypes.c_long), ('shift', ctypes.c_int),
+        ('stabil', ctypes.c_long), ('jitcnt', ctypes.c_long), ('calcnt', ctypes.c_long),
+        ('errcnt', ctypes.c_long), ('stbcnt', ctypes.c_long), ('tai', ctypes.c_int),
+        ('_reserved', ctypes.c_int * 11),
+    ]
+
+
+class KernelClockSource:
+    """系统时间服务（chrony、systemd-timesyncd、ntpd 等）的同步状态
+
+    在 Linux 上通过 adjtimex（modes=0，只读，不需要权限）读取内核的时钟状态。
+    系统时间已经被时间服务校准、且内核估计误差不超过 MAX_ERROR 时，
+    本地时间本身就是准确的，可以直接代替网络NTP查询（偏移量为0）。
+    其他系统或读取失败时 status() 返回 None，调用方应退回 NTPTimeSync。
+    """
+
+    NAME = '系统时间服务'
+    MAX_ERROR = 0.1  # 内核估计误差超过该值（秒）时不采用
+    STA_UNSYNC = 0x0040  # 时钟未同步
+    STA_NANO = 0x2000  # offset 以纳秒为单位（否则为微秒）
+    TIME_ERROR = 5  # adjtimex 返回值：时钟未同步
+
+    def __init__(self):
+        self._adjtimex = None
+        if sys.platform.startswith('linux'):
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+                self._adjtimex = libc.adjtimex
+                self._adjtimex.argtypes = [ctypes.POINTER(_Timex)]
+                self._adjtimex.restype = ctypes.c_int
+            except (OSError, AttributeError) as e:
+                print(f"无法读取系统时钟同步状态: {e}")
+                self._adjtimex = None
+
+    @property
+    def available(self):
+        return self._adjtimex is not None
+
+    def status(self):
+        """读取内核时钟状态，不可用时返回 None；误差和偏移量单位为秒"""
+        if self._adjtimex is None:
+            return None
+        timex = _Timex()
+        state = self._adjtimex(ctypes.byref(timex))
+        if state < 0:
+            print(f"读取系统时钟同步状态失败: errno {ctypes.get_errno()}")
+            return None
+        offset_units = 1e9 if timex.status & self.STA_NANO else 1e6
+        return {
+            'synced': state != self.TIME_ERROR and not timex.status & self.STA_UNSYNC,
+            'state': state,
+            'status': timex.status,
+            'esterror': timex.esterror / 1e6,
+            'maxerror': timex.maxerror / 1e6,
+            'offset': timex.offset / offset_units,
+            'freq_ppm': timex.freq / 65536,
+        }
+
+    def sync_result(self, max_error=None):
+        """系统时钟已校准时返回与 NTPTimeSync.get_ntp_time 相同格式的结果（偏移量为0），否则返回 None"""
+        if max_error is None:
+            max_error = self.MAX_ERROR
+        status = self.status()
+        if status is None or not status['synced'] or status['esterror'] > max_error:
+            return None
+        local_time = systime.time()
+        return {
+            'timestamp': local_time,
+            'server': self.NAME,
+            'latency': 0.0,
+            'delay': 0.0,
+            'local_time': local_time,
+            'offset': 0.0,
+            'jitter': status['esterror'],
+            'servers': [self.NAME],
+            'falsetickers': [],
+        }
+
+
+class NTPClock:
+    """NTP校正时钟：根据历次同步结果校正本地时间
+
+    每次同步测得的偏移量不会直接跳变到显示上：与当前校正量相差不超过
+    STEP_THRESHOLD 时，以不超过 SLEW_RATE 的速率逐渐追上（slew），只有首次同步或
+    偏差过大时才直接跳变（step）。相隔至少 MIN_FREQ_INTERVAL 的两次同步之间偏移量的
+    变化率就是本地晶振的频率误差（漂移率），平滑后用来外推两次同步之间的偏移量，
+    这样即使同步间隔很长，校正时间也能保持准确。
+    """
+
+    STEP_THRESHOLD = 0.128  # 超过该偏差（秒）直接跳变，不再逐渐追赶
+    SLEW_RATE = 500e-6  # 逐渐追赶时每秒最多调整的秒数（500 ppm）
+    MAX_FREQ = 500e-6  # 可信的最大频率误差，超过说明本地时间被手动调整过
+    MIN_FREQ_INTERVAL = 60  # 估计频率误差所需的最短同步间隔（秒）
+    FREQ_GAIN = 0.25  # 新的频率估计所占的权重
+    CONFIDENCE_TIME = 86400  # 同步结果的可信度按 exp(-距上次同步秒数 / CONFIDENCE_TIME) 衰减
+    MIN_CONFIDENCE = 0.1  # 恢复保存的状态时，可信度低于该值则放弃
+
+    def __init__(self, clock=None):
+        self.clock = clock or SYSTEM_CLOCK
+        self.enabled = False  # 是否启用NTP同步
+        self.offset = 0.0  # 最近一次测得的NTP时间与本地时间的偏移量（秒）
+        self.freq = 0.0  # 本地时钟的频率误差（秒/秒），正值表示本地时钟偏慢
+        self.last_sync_time = None  # 上次同步时间
+        self.restored = False  # 当前校正量是否来自上次运行保存的状态（尚未重新同步）
+        self._last_sync_wall = None  # 上次同步时的本地时间（秒）
+        self._freq_valid = False
+        self._ref = None  # 上次同步时的 monotonic 时间（秒）
+        self._phase = 0.0  # 上次同步时刻的校正量
+        self._slew = 0.0  # 尚待逐渐追赶的偏差
+        self._last_measurement = None  # 用于估计频率的 (monotonic 秒, 偏移量)
+
+    def _monotonic(self):
+        return self.clock.monotonic_ns() / NS_PER_SECOND
+
+    @property
+    def drift_ppm(self):
+        """本地时钟的频率误差（百万分之一）"""
+        return self.freq * 1e6
+
+    @property
+    def confidence(self):
+        """校正量的可信度（0~1），随距上次同步的时间衰减"""
+        if self._last_sync_wall is None:
+            return 0.0
+        age = max(0.0, self.clock.time() - self._last_sync_wall)
+        return math.exp(-age / self.CONFIDENCE_TIME)
+
+    def correction(self, at=None):
+        """at（monotonic 秒，默认现在）时刻应加到本地时间上的校正量"""
+        if self._ref is None:
+            return 0.0
+        elapsed = (self._monotonic() if at is None else at) - self._ref
+        slewed = min(abs(self._slew), self.SLEW_RATE * elapsed)
+        return self._phase + self.freq * elapsed + (slewed if self._slew >= 0 else -slewed)
+
+    def apply_sync(self, result):
+        """应用一次NTP同步结果（get_ntp_time/get_formatted_ntp_time 的返回值）"""
+        measured = result['offset']
+        now = self._monotonic()
+
+        if self._last_measurement is not None:
+            last_time, last_offset = self._last_measurement
+            interval = now - last_time
+            if interval >= self.MIN_FREQ_INTERVAL:
+                freq_sample = (measured - last_offset) / interval
+                if abs(freq_sample) <= self.MAX_FREQ:
+                    if self._freq_valid:
+                        self.freq += self.FREQ_GAIN * (freq_sample - self.freq)
+                    else:
+                        self.freq = freq_sample
+                        self._freq_valid = True
+                self._last_measurement = (now, measured)
+        else:
+            self._last_measurement = (now, measured)
+
+        current = self.correction(now)
+        # 恢复的校正量只是启动时的临时值（可信度随保存时间衰减），第一次真正同步直接跳变
+        if self._ref is None or self.restored or abs(measured - current) > self.STEP_THRESHOLD:
+            self._phase = measured
+            self._slew = 0.0
+        else:
+            self._phase = current
+            self._slew = measured - current
+        self._ref = now
+        self.offset = measured
+        self._last_sync_wall = self.clock.time()
+        self.last_sync_time = datetime.fromtimestamp(self._last_sync_wall)
+        self.restored = False
+
+    def state(self):
+        """导出时钟状态（可以保存为JSON），没有同步过时返回 None
+
+        时间都以本地时间记录，另外保存导出时的 monotonic 时间和开机标识，
+        恢复时如果仍是同一次开机，用来判断期间本地时间是否被调整过。
+        """
+        if self._ref is None:
+            return None
+        mono = self._monotonic()
+        wall = self.clock.time()
+        state = {
+            'wall': wall,
+            'mono': mono,
+            'correction': self.correction(mono),
+            'offset': self.offset,
+            'freq': self.freq if self._freq_valid else None,
+            'sync_wall': self._last_sync_wall,
+        }
+        boot_id = self.clock.boot_id()
+        if boot_id is not None:
+            state['boot'] = boot_id
+        if self._last_measurement is not None:
+            measured_at, measured = self._last_measurement
+            state['measurement'] = [wall - (mono - measured_at), measured]
+        return state
+
+    def restore_state(self, state):
+        """恢复 state() 导出的状态，成功返回 True
+
+        本地时间倒退、同一次开机内本地时间被调整过（开机标识相同时才能判断），或距上次同步太久
+        （可信度低于 MIN_CONFIDENCE）时放弃恢复。不是同一次开机（或无法判断）时，关机期间
+        本地时间来自硬件时钟，不再按频率误差外推校正量，也不保留用于估计频率的旧测量。
+        恢复的校正量只在下一次同步前使用，下一次同步直接跳变到测得的偏移量。
+        """
+        if not state:
+            return False
+        try:
+            wall_now = self.clock.time()
+            mono_now = self._monotonic()
+            since_save = wall_now - state['wall']
+            sync_wall = state['sync_wall']
+            if since_save < 0 or wall_now < sync_wall:
+                return False
+            if math.exp(-(wall_now - sync_wall) / self.CONFIDENCE_TIME) < self.MIN_CONFIDENCE:
+                return False
+            boot_id = self.clock.boot_id()
+            same_boot = boot_id is not None and state.get('boot') == boot_id
+            if same_boot:
+                # 同一次开机（monotonic 时间连续且包含挂起时间），两种时间的差说明本地时间被调整过
+                if abs((mono_now - state['mono']) - since_save) > self.STEP_THRESHOLD:
+                    return False
+
+            freq = state.get('freq')
+            self._freq_valid = freq is not None
+            self.freq = freq or 0.0
+            self._phase = state['correction'] + (self.freq * since_save if same_boot else 0.0)
+            self._slew = 0.0
+            self._ref = mono_now
+            self.offset = state['offset']
+            self._last_sync_wall = sync_wall
+            self.last_sync_time = datetime.fromtimestamp(sync_wall)
+            measurement = state.get('measurement') if same_boot else None
+            if measurement:
+                self._last_measurement = (mono_now - (wall_now - measurement[0]), measurement[1])
+            else:
+                self._last_measurement = None
+            self.restored = True
+            return True
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"恢复NTP时钟状态失败: {e}")
+            return False
+
+    def now(self):
+        """获取经过NTP校正的时间"""
+        if self.enabled and self.last_sync_time:
+            return self.clock.time() + self.correction()
+        else:
+            return self.clock.time()